@@ -0,0 +1,223 @@
+import asyncio
+import os
+import runpy
+import sys
+import time
+import types
+
+# Runs graph_server.py with in-process stand-ins for Neo4j (both the LangChain
+# wrapper and the async driver) and Groq, so
+# bench_servers.py can measure the MCP server without a database or API key.
+# Each simulated backend call sleeps for BENCH_STUB_LATENCY seconds; an uncached
+# question costs two LLM calls (Cypher generation and answer) plus one query.
+#
+# Usage (arguments are passed through to graph_server.py):
+#   BENCH_STUB_LATENCY=0.05 python bench_graph_stub.py --transport stdio
+
+LATENCY = float(os.getenv("BENCH_STUB_LATENCY", "0.05"))
+
+STUB_SCHEMA = """Node properties:
+Model {name: STRING, released: INTEGER}
+Organization {name: STRING}
+Relationship properties:
+
+The relationships:
+(:Organization)-[:RELEASED]->(:Model)"""
+
+
+STUB_STRUCTURED_SCHEMA = {
+    "node_props": {
+        "Model": [{"property": "name", "type": "STRING"}, {"property": "released", "type": "INTEGER"}],
+        "Organization": [{"property": "name", "type": "STRING"}],
+    },
+    "rel_props": {},
+    "relationships": [{"start": "Organization", "type": "RELEASED", "end": "Model"}],
+}
+
+# Rows returned by run_cypher queries, enough to span a few pages
+STUB_MODEL_COUNT = 250
+
+STUB_SIGNATURE_ROW = {"labels": ["Model", "Organization"], "rel_types": ["RELEASED"], "property_keys": 2}
+
+
+class StubNeo4jGraph:
+    """Answers every query with a fixed row after LATENCY seconds."""
+
+    def __init__(self, *args, refresh_schema=True, **kwargs):
+        # Neo4jGraph connects on construction
+        time.sleep(LATENCY)
+        self.schema = ""
+        self.structured_schema = {}
+        if refresh_schema:
+            self.refresh_schema()
+
+    def query(self, query, params=None):
+        if "apoc.meta.stats" in query:
+            return [dict(STUB_SIGNATURE_ROW)]
+        time.sleep(LATENCY)
+        return [{"name": "stub-model", "released": 2024}]
+
+    def refresh_schema(self):
+        # Reading the schema samples the whole graph
+        time.sleep(LATENCY)
+        self.schema = STUB_SCHEMA
+        self.structured_schema = STUB_STRUCTURED_SCHEMA
+
+    def close(self):
+        pass
+
+
+class StubQuery:
+    def __init__(self, text, metadata=None, timeout=None):
+        self.text = text
+        self.timeout = timeout
+
+
+class StubRecord(dict):
+    def data(self):
+        return dict(self)
+
+
+class StubAsyncResult:
+    def __init__(self, rows):
+        self.rows = rows
+
+    async def fetch(self, n):
+        records, self.rows = self.rows[:n], self.rows[n:]
+        return [StubRecord(row) for row in records]
+
+    async def peek(self):
+        return StubRecord(self.rows[0]) if self.rows else None
+
+
+class StubAsyncTransaction:
+    """A read transaction over STUB_MODEL_COUNT models; writes fail as they would in read access mode."""
+
+    async def run(self, query, parameters=None, **kwargs):
+        await asyncio.sleep(LATENCY)
+        if any(word in query.upper().split() for word in ("CREATE", "MERGE", "DELETE", "SET", "REMOVE")):
+            raise RuntimeError("Writing in read access mode not allowed.")
+        return StubAsyncResult([{"name": f"stub-model-{i}", "released": 2024} for i in range(STUB_MODEL_COUNT)])
+
+    async def close(self):
+        pass
+
+
+class StubAsyncSession:
+    """neo4j.AsyncSession: each run waits LATENCY seconds without blocking the loop."""
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    async def begin_transaction(self, **kwargs):
+        return StubAsyncTransaction()
+
+    async def close(self):
+        pass
+
+    async def run(self, query, parameters=None, **kwargs):
+        await asyncio.sleep(LATENCY)
+        return StubAsyncResult([{"name": "stub-model", "released": 2024}])
+
+
+class StubAsyncDriver:
+    def session(self, **kwargs):
+        return StubAsyncSession()
+
+    async def verify_connectivity(self):
+        pass
+
+    async def close(self):
+        pass
+
+
+class StubAsyncGraphDatabase:
+    @staticmethod
+    def driver(uri, **kwargs):
+        return StubAsyncDriver()
+
+
+class StubChatGroq:
+    def __init__(self, *args, **kwargs):
+        pass
+
+
+class StubLLMStep:
+    """Stands in for one prompt | llm | parser pipeline: sleeps, then returns `reply(inputs)`."""
+
+    def __init__(self, reply):
+        self.reply = reply
+
+    def invoke(self, inputs):
+        time.sleep(LATENCY)
+        return self.reply(inputs)
+
+    async def ainvoke(self, inputs):
+        await asyncio.sleep(LATENCY)
+        return self.reply(inputs)
+
+
+class StubGraphCypherQAChain:
+    """Mimics GraphCypherQAChain: generate Cypher, run it, phrase an answer."""
+
+    top_k = 10
+
+    def __init__(self, graph):
+        self.graph = graph
+        self.cypher_generation_chain = StubLLMStep(
+            lambda inputs: "MATCH (m:Model) RETURN m.name AS name, m.released AS released"
+        )
+        self.qa_chain = StubLLMStep(
+            lambda inputs: f"Stub answer based on {len(inputs['context'])} row(s)"
+        )
+
+    @classmethod
+    def from_llm(cls, llm=None, graph=None, **kwargs):
+        return cls(graph)
+
+    def invoke(self, inputs):
+        cypher = self.cypher_generation_chain.invoke({"question": inputs["query"], "schema": self.graph.schema})
+        rows = self.graph.query(cypher)[:self.top_k]
+        answer = self.qa_chain.invoke({"question": inputs["query"], "context": rows})
+        return {"query": inputs["query"], "result": answer}
+
+    async def ainvoke(self, inputs):
+        return await asyncio.to_thread(self.invoke, inputs)
+
+
+def install_stubs() -> None:
+    neo4j_module = types.ModuleType("langchain_neo4j")
+    neo4j_module.Neo4jGraph = StubNeo4jGraph
+    neo4j_module.GraphCypherQAChain = StubGraphCypherQAChain
+    cypher_module = types.ModuleType("langchain_neo4j.chains.graph_qa.cypher")
+    cypher_module.extract_cypher = lambda text: text.strip()
+    schema_module = types.ModuleType("neo4j_graphrag.schema")
+    schema_module.format_schema = lambda schema, is_enhanced: STUB_SCHEMA
+    driver_module = types.ModuleType("neo4j")
+    driver_module.READ_ACCESS = "READ"
+    driver_module.AsyncDriver = StubAsyncDriver
+    driver_module.AsyncResult = StubAsyncResult
+    driver_module.AsyncSession = StubAsyncSession
+    driver_module.AsyncTransaction = StubAsyncTransaction
+    driver_module.AsyncGraphDatabase = StubAsyncGraphDatabase
+    driver_module.Query = StubQuery
+    groq_module = types.ModuleType("langchain_groq")
+    groq_module.ChatGroq = StubChatGroq
+    sys.modules["langchain_neo4j"] = neo4j_module
+    for name in ("langchain_neo4j.chains", "langchain_neo4j.chains.graph_qa"):
+        sys.modules[name] = types.ModuleType(name)
+    sys.modules["langchain_neo4j.chains.graph_qa.cypher"] = cypher_module
+    sys.modules["neo4j_graphrag"] = types.ModuleType("neo4j_graphrag")
+    sys.modules["neo4j_graphrag.schema"] = schema_module
+    sys.modules["neo4j"] = driver_module
+    sys.modules["langchain_groq"] = groq_module
+
+
+if __name__ == "__main__":
+    install_stubs()
+    server_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "graph_server.py")
+    sys.argv = [server_path, *sys.argv[1:]]
+    runpy.run_path(server_path, run_name="__main__")
@@ -0,0 +1,393 @@
+import argparse
+import asyncio
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.stdio import stdio_client
+from mcp.client.streamable_http import streamablehttp_client
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+# Load and latency benchmark for the MCP servers in this folder.
+#
+# Each run spawns a server (over stdio or streamable-http), opens an
+# mcp.ClientSession to it, and issues `--requests` call_tool requests with
+# `--concurrency` of them in flight at once. It reports throughput, latency
+# percentiles and the server's memory use, and writes everything to a JSON file
+# so results can be compared between commits (see --baseline).
+#
+# Real backends are replaced with local stubs, so results measure the servers
+# themselves rather than third-party APIs:
+#   weather       - built-in mock data
+#   weather-http  - the HTTP provider against weather_stub_upstream.py
+#   graph         - graph_server.py with stand-ins for Neo4j and Groq (bench_graph_stub.py)
+#   graph-uncached - the same with its question and result caches disabled, to
+#                   measure the full generate-query-answer path
+#
+# Usage:
+#   python bench_servers.py --server weather --transport stdio streamable-http \
+#       --concurrency 1 8 32 --requests 2000 --output bench-results.json
+#   python bench_servers.py --server weather-http --upstream-delay 0.05 \
+#       --env WEATHER_CACHE_TTL=1 --baseline old-results.json
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# The graph server caches answers per question, so its workload cycles through
+# several distinct questions rather than repeating one
+GRAPH_QUESTIONS = [
+    {"query": "Which models were released in 2024?"},
+    {"query": "Which organizations released the most models?"},
+    {"query": "List the models released by OpenAI"},
+    {"query": "What is the most recent model?"},
+    {"query": "How many models were released before 2020?"},
+    {"query": "Which organization released GPT-4?"},
+    {"query": "Which models have more than one release?"},
+    {"query": "Name the organizations with no models"},
+]
+
+# Stub settings shared by the graph workloads: no schema snapshot, so stub runs
+# never write into the user's real cache directory
+GRAPH_STUB_ENV = {"GRAPH_SCHEMA_SNAPSHOT_PATH": ""}
+
+# Servers the harness can launch: the script, environment overrides that swap
+# real backends for stubs, and the default tool calls used as the workload
+# (one argument dict, or a list of them used in turn)
+SERVERS: Dict[str, Dict[str, Any]] = {
+    "weather": {
+        "script": "weather_server.py",
+        "env": {"WEATHER_PROVIDER": "mock", "WEATHER_SNAPSHOT_PATH": ""},
+        "tool": "get_current_weather",
+        "args": {"city": "London"},
+    },
+    "weather-http": {
+        "script": "weather_server.py",
+        "env": {"WEATHER_PROVIDER": "http", "WEATHER_SNAPSHOT_PATH": ""},
+        "upstream": True,
+        "tool": "get_weather_batch",
+        "args": {"cities": ["London", "Tokyo", "New York", "San Francisco"]},
+    },
+    "graph": {
+        "script": "bench_graph_stub.py",
+        "env": GRAPH_STUB_ENV,
+        "tool": "get_data_on_llm",
+        "args": GRAPH_QUESTIONS,
+    },
+    "graph-uncached": {
+        "script": "bench_graph_stub.py",
+        "env": {**GRAPH_STUB_ENV, "GRAPH_CYPHER_CACHE_TTL": "0", "GRAPH_RESULT_CACHE_TTL": "0"},
+        "tool": "get_data_on_llm",
+        "args": GRAPH_QUESTIONS,
+    },
+}
+
+# How long to wait for a server or stub to start accepting connections, in seconds
+STARTUP_TIMEOUT = 30
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_port(port: int, process: subprocess.Popen) -> None:
+    deadline = time.monotonic() + STARTUP_TIMEOUT
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"process exited with code {process.returncode} before listening on {port}")
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"nothing listening on port {port} after {STARTUP_TIMEOUT}s")
+
+
+def find_child_pid(script: str) -> Optional[int]:
+    """Find the PID of a server process we started (stdio_client doesn't expose it)."""
+    if psutil is not None:
+        for child in psutil.Process().children(recursive=True):
+            try:
+                if any(script in part for part in child.cmdline()):
+                    return child.pid
+            except psutil.Error:
+                continue
+        return None
+
+    # Linux without psutil: scan /proc for our children
+    if not os.path.isdir("/proc"):
+        return None
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+            with open(f"/proc/{entry}/cmdline", "rb") as f:
+                cmdline = f.read().decode(errors="replace")
+        except (OSError, IndexError, ValueError):
+            continue
+        if ppid == os.getpid() and script in cmdline:
+            return int(entry)
+    return None
+
+
+def read_memory_mb(pid: Optional[int]) -> Dict[str, Optional[float]]:
+    """Current and peak resident memory of a process, in MB (None where unavailable)."""
+    memory: Dict[str, Optional[float]] = {"rss_mb": None, "peak_rss_mb": None}
+    if pid is None:
+        return memory
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    memory["rss_mb"] = round(int(line.split()[1]) / 1024, 1)
+                elif line.startswith("VmHWM:"):
+                    memory["peak_rss_mb"] = round(int(line.split()[1]) / 1024, 1)
+        return memory
+    except OSError:
+        pass
+    if psutil is not None:
+        try:
+            memory["rss_mb"] = round(psutil.Process(pid).memory_info().rss / 2**20, 1)
+        except psutil.Error:
+            pass
+    return memory
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[rank]
+
+
+async def drive(session: ClientSession, tool: str, workload: List[Dict[str, Any]],
+                requests: int, concurrency: int, warmup: int) -> Dict[str, Any]:
+    """
+    Issue `requests` tool calls with `concurrency` in flight, taking their
+    arguments from `workload` in turn; return timing stats.
+    """
+    calls = 0
+
+    def next_args() -> Dict[str, Any]:
+        nonlocal calls
+        calls += 1
+        return workload[(calls - 1) % len(workload)]
+
+    for _ in range(warmup):
+        await session.call_tool(tool, next_args())
+
+    latencies: List[float] = []
+    errors = 0
+    remaining = requests
+
+    async def worker() -> None:
+        nonlocal remaining, errors
+        while remaining > 0:
+            remaining -= 1
+            start = time.perf_counter()
+            try:
+                result = await session.call_tool(tool, next_args())
+                if result.isError:
+                    errors += 1
+            except Exception:
+                errors += 1
+            latencies.append(time.perf_counter() - start)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "duration_s": round(elapsed, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "latency_ms": {
+            "mean": round(sum(latencies) / len(latencies) * 1000, 3) if latencies else 0.0,
+            "p50": round(percentile(latencies, 50) * 1000, 3),
+            "p95": round(percentile(latencies, 95) * 1000, 3),
+            "p99": round(percentile(latencies, 99) * 1000, 3),
+            "max": round(latencies[-1] * 1000, 3) if latencies else 0.0,
+        },
+    }
+
+
+async def run_stdio(script_path: str, env: Dict[str, str], tool: str, workload: List[Dict[str, Any]],
+                    concurrency: int, options: argparse.Namespace, errlog) -> Dict[str, Any]:
+    params = StdioServerParameters(
+        command=sys.executable,
+        args=[script_path, "--transport", "stdio"],
+        env=env,
+        cwd=HERE,
+    )
+    async with stdio_client(params, errlog=errlog) as (read, write):
+        async with ClientSession(read, write) as session:
+            await session.initialize()
+            stats = await drive(session, tool, workload, options.requests, concurrency, options.warmup)
+            stats.update(read_memory_mb(find_child_pid(script_path)))
+            return stats
+
+
+async def run_http(script_path: str, env: Dict[str, str], tool: str, workload: List[Dict[str, Any]],
+                   concurrency: int, options: argparse.Namespace, errlog) -> Dict[str, Any]:
+    port = free_port()
+    process = subprocess.Popen(
+        [sys.executable, script_path, "--transport", "streamable-http", "--port", str(port)],
+        env=env,
+        cwd=HERE,
+        stdout=errlog,
+        stderr=errlog,
+    )
+    try:
+        await asyncio.to_thread(wait_for_port, port, process)
+        async with streamablehttp_client(f"http://127.0.0.1:{port}/mcp") as (read, write, _):
+            async with ClientSession(read, write) as session:
+                await session.initialize()
+                stats = await drive(session, tool, workload, options.requests, concurrency, options.warmup)
+                stats.update(read_memory_mb(process.pid))
+                return stats
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def start_upstream(delay: float, errlog) -> Tuple[subprocess.Popen, int]:
+    """Start weather_stub_upstream.py on a free port."""
+    port = free_port()
+    process = subprocess.Popen(
+        [sys.executable, os.path.join(HERE, "weather_stub_upstream.py"), "--port", str(port), "--delay", str(delay)],
+        cwd=HERE,
+        stdout=errlog,
+        stderr=errlog,
+    )
+    wait_for_port(port, process)
+    return process, port
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=HERE, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_key(run: Dict[str, Any]) -> tuple:
+    return (run["server"], run["transport"], run["tool"], run["concurrency"])
+
+
+def print_run(run: Dict[str, Any], baseline: Dict[tuple, Dict[str, Any]]) -> None:
+    latency = run["latency_ms"]
+    line = (
+        f"{run['server']:<14} {run['transport']:<16} c={run['concurrency']:<4} "
+        f"{run['throughput_rps']:>9.1f} req/s  p50 {latency['p50']:>8.2f}  p95 {latency['p95']:>8.2f}  "
+        f"p99 {latency['p99']:>8.2f} ms  rss {run.get('rss_mb') or '?'} MB  errors {run['errors']}"
+    )
+    previous = baseline.get(run_key(run))
+    if previous:
+        rps_change = (run["throughput_rps"] / previous["throughput_rps"] - 1) * 100 if previous["throughput_rps"] else 0
+        p95_change = (latency["p95"] / previous["latency_ms"]["p95"] - 1) * 100 if previous["latency_ms"]["p95"] else 0
+        line += f"  (vs baseline: throughput {rps_change:+.1f}%, p95 {p95_change:+.1f}%)"
+    print(line)
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the local MCP servers over stdio and streamable-http")
+    parser.add_argument("--server", nargs="+", default=["weather"], choices=sorted(SERVERS))
+    parser.add_argument("--transport", nargs="+", default=["stdio", "streamable-http"], choices=["stdio", "streamable-http"])
+    parser.add_argument("--concurrency", nargs="+", type=int, default=[1, 8, 32], help="in-flight requests per run")
+    parser.add_argument("--requests", type=int, default=1000, help="measured tool calls per run")
+    parser.add_argument("--warmup", type=int, default=20, help="unmeasured tool calls before each run")
+    parser.add_argument("--tool", help="tool to call (default: the server's standard workload)")
+    parser.add_argument("--args", help="tool arguments as JSON, or a JSON list of them used in turn "
+                                       "(default: the server's standard workload)")
+    parser.add_argument("--env", action="append", default=[], metavar="KEY=VALUE", help="extra server environment")
+    parser.add_argument("--upstream-delay", type=float, default=0.05, help="stub upstream latency in seconds (weather-http)")
+    parser.add_argument("--output", default="bench-results.json", help="where to write the JSON results")
+    parser.add_argument("--baseline", help="earlier results file to compare against")
+    options = parser.parse_args()
+
+    baseline: Dict[tuple, Dict[str, Any]] = {}
+    if options.baseline:
+        with open(options.baseline, encoding="utf-8") as f:
+            baseline = {run_key(run): run for run in json.load(f)["runs"]}
+
+    extra_env = dict(item.split("=", 1) for item in options.env)
+    log_path = os.path.splitext(options.output)[0] + ".log"
+    runs = []
+
+    with open(log_path, "a", encoding="utf-8") as errlog:
+        for server_name in options.server:
+            spec = SERVERS[server_name]
+            tool = options.tool or spec["tool"]
+            args = json.loads(options.args) if options.args else spec["args"]
+            workload = args if isinstance(args, list) else [args]
+            script_path = os.path.join(HERE, spec["script"])
+
+            env = {**os.environ, "FASTMCP_LOG_LEVEL": "WARNING", **spec["env"], **extra_env}
+            upstream = None
+            if spec.get("upstream"):
+                upstream, upstream_port = start_upstream(options.upstream_delay, errlog)
+                env["WEATHER_API_URL"] = f"http://127.0.0.1:{upstream_port}"
+
+            try:
+                for transport in options.transport:
+                    for concurrency in options.concurrency:
+                        runner = run_stdio if transport == "stdio" else run_http
+                        try:
+                            stats = await runner(script_path, env, tool, workload, concurrency, options, errlog)
+                        except Exception as e:
+                            print(f"{server_name:<14} {transport:<16} c={concurrency:<4} failed: {e} (see {log_path})")
+                            continue
+                        run = {
+                            "server": server_name,
+                            "transport": transport,
+                            "tool": tool,
+                            "concurrency": concurrency,
+                            **stats,
+                        }
+                        runs.append(run)
+                        print_run(run, baseline)
+            finally:
+                if upstream is not None:
+                    upstream.terminate()
+                    upstream.wait()
+
+    results = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "requests": options.requests,
+            "warmup": options.warmup,
+            "env": extra_env,
+        },
+        "runs": runs,
+    }
+    with open(options.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults written to {options.output}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
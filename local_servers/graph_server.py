@@ -1,6 +1,23 @@
+import argparse
+import asyncio
+import hashlib
+import json
 import os
+import re
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Dict, List, NamedTuple, Optional, Tuple
+import numpy as np
+from neo4j import READ_ACCESS, AsyncDriver, AsyncGraphDatabase, AsyncResult, AsyncSession, AsyncTransaction, Query
 from langchain_neo4j import GraphCypherQAChain, Neo4jGraph
+from langchain_neo4j.chains.graph_qa.cypher import extract_cypher
 from langchain.prompts import PromptTemplate
+from neo4j_graphrag.schema import format_schema
 
 from dotenv import load_dotenv
 load_dotenv()
@@ -9,46 +26,191 @@ from langchain_groq import ChatGroq
 from mcp.server.fastmcp import FastMCP
 
 
+@asynccontextmanager
+async def warm_up_backend(server: FastMCP) -> AsyncIterator[None]:
+    """Start connecting to Neo4j and the LLM in the background, without delaying the handshake."""
+    graph_backend.start()
+    yield
+
+
 # Create MCP server instance
-mcp = FastMCP("neo4j-assistant")
+mcp = FastMCP("neo4j-assistant", lifespan=warm_up_backend)
 
-@mcp.tool()
-def get_data_on_llm(query: str) -> str:
-    """
-    Get the information on LLM releted questions.
+# Seconds to wait before retrying after the backend failed to start
+GRAPH_STARTUP_RETRY_SECONDS = float(os.getenv("GRAPH_STARTUP_RETRY_SECONDS", "10"))
 
-    This tool provides information on the query related to llm.
+# Queries run on one pooled async Neo4j driver. GRAPH_POOL_SIZE bounds open
+# connections; a query waits at most GRAPH_POOL_ACQUIRE_TIMEOUT seconds for one
+# and may run for GRAPH_QUERY_TIMEOUT seconds before the server aborts it.
+GRAPH_POOL_SIZE = int(os.getenv("GRAPH_POOL_SIZE", "50"))
+GRAPH_POOL_ACQUIRE_TIMEOUT = float(os.getenv("GRAPH_POOL_ACQUIRE_TIMEOUT", "30"))
+GRAPH_QUERY_TIMEOUT = float(os.getenv("GRAPH_QUERY_TIMEOUT", "30"))
 
-    Args:
-        Query: The question asked by the user.
-    
-    Returns:
-        A formatted string with answer to the given query
-    Example:
-        get_data_on_llm("what are the actions in llm?") returns response in string format.
-    """
-    try:
-        def run_cypher(q):
-            return cypher_chain.invoke({"query": q})
-        return run_cypher(query)
-    except Exception as e:
-        return f"Error occured {e}"
+# Upper bound on questions answered at once (the rest wait their turn), and on
+# the time one question may take end to end, waiting for a slot and LLM calls included
+GRAPH_MAX_CONCURRENCY = int(os.getenv("GRAPH_MAX_CONCURRENCY", "16"))
+GRAPH_REQUEST_TIMEOUT = float(os.getenv("GRAPH_REQUEST_TIMEOUT", "120"))
 
-llm = ChatGroq(
-    model="deepseek-r1-distill-llama-70b",
-    api_key=os.getenv("GROQ_API_KEY"),
-    temperature=0,
-    max_tokens=None,
-    reasoning_format="parsed",
-    timeout=None,
-    max_retries=2
-)
+# run_cypher pages: rows per page at most, how many paged queries may be open at
+# once (each holds a connection), and how long one may stay open in total
+GRAPH_MAX_PAGE_SIZE = int(os.getenv("GRAPH_MAX_PAGE_SIZE", "1000"))
+GRAPH_MAX_CURSORS = int(os.getenv("GRAPH_MAX_CURSORS", "16"))
+GRAPH_CURSOR_TTL = float(os.getenv("GRAPH_CURSOR_TTL", "120"))
 
-graph = Neo4jGraph(
-    url=os.getenv('NEO4J_URI'),
-    username=os.getenv('NEO4J_USERNAME'),
-    password=os.getenv('NEO4J_PASSWORD')
+# Question cache (level 1): normalised question -> generated Cypher and answer.
+# Generated Cypher only changes with the schema, so entries live long.
+GRAPH_CYPHER_CACHE_SIZE = int(os.getenv("GRAPH_CYPHER_CACHE_SIZE", "1024"))
+GRAPH_CYPHER_CACHE_TTL = float(os.getenv("GRAPH_CYPHER_CACHE_TTL", "86400"))
+
+# Result cache (level 2): Cypher + parameters -> result rows.
+# Rows change with the data, so entries expire sooner.
+GRAPH_RESULT_CACHE_SIZE = int(os.getenv("GRAPH_RESULT_CACHE_SIZE", "1024"))
+GRAPH_RESULT_CACHE_TTL = float(os.getenv("GRAPH_RESULT_CACHE_TTL", "300"))
+
+# How often to check whether the graph schema changed (which clears both caches).
+# The check compares label/relationship-type/property-key counts, which Neo4j keeps
+# in its count store, so it is cheap; the full schema is only re-read on a change.
+GRAPH_SCHEMA_CHECK_SECONDS = float(os.getenv("GRAPH_SCHEMA_CHECK_SECONDS", "60"))
+
+# Where the schema is saved between runs, so a restart against an unchanged graph
+# skips the slow apoc.meta.data() sampling (set to an empty string to disable)
+GRAPH_SCHEMA_SNAPSHOT_PATH = os.path.expanduser(
+    os.getenv("GRAPH_SCHEMA_SNAPSHOT_PATH", "~/.cache/neo4j-mcp/schema.json")
 )
+SCHEMA_SNAPSHOT_VERSION = 1
+
+# Only put the labels and relationships a question mentions (plus their direct
+# neighbours) into the Cypher generation prompt; "0" sends the full schema
+GRAPH_SCHEMA_PRUNE = os.getenv("GRAPH_SCHEMA_PRUNE", "1") != "0"
+
+# Label names, relationship-type names and property-key count: these change when
+# the shape of the graph changes, but not when data is added to existing labels.
+SCHEMA_SIGNATURE_QUERY = """CALL apoc.meta.stats() YIELD labels, relTypesCount, propertyKeyCount
+RETURN [label IN keys(labels) WHERE labels[label] > 0] AS labels,
+       [type IN keys(relTypesCount) WHERE relTypesCount[type] > 0] AS rel_types,
+       propertyKeyCount AS property_keys"""
+
+# Optional similarity hits: with GRAPH_EMBEDDING_MODEL set (a sentence-transformers
+# model name; needs the langchain-huggingface package), a question whose embedding
+# has cosine similarity >= GRAPH_CACHE_SIMILARITY with a cached question reuses its
+# Cypher. Keep the threshold high: similar wording can still ask for different things.
+GRAPH_EMBEDDING_MODEL = os.getenv("GRAPH_EMBEDDING_MODEL", "")
+GRAPH_CACHE_SIMILARITY = float(os.getenv("GRAPH_CACHE_SIMILARITY", "0.95"))
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries also expire `ttl` seconds after being stored."""
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Any, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Any) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: Any, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def items(self) -> List[tuple]:
+        """Snapshot of the live (key, value) pairs."""
+        now = time.monotonic()
+        with self._lock:
+            return [(key, entry[1]) for key, entry in self._entries.items() if entry[0] >= now]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class CypherEntry(NamedTuple):
+    """A level-1 cache entry: the Cypher for a question and the answer last given."""
+    cypher: str
+    answer: Optional[str]
+    rows_digest: Optional[str]
+    embedding: Optional[np.ndarray]  # unit length
+
+
+def normalize_question(question: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace, so trivial rewordings share a key."""
+    return " ".join(re.sub(r"[^\w\s]", " ", question.lower()).split())
+
+
+class CypherCache:
+    """
+    Level 1: normalised question -> generated Cypher (plus the answer given).
+
+    Exact matches on the normalised question are dict lookups. If an `embed`
+    function is configured, a miss falls back to the cached question with the
+    most similar embedding, if it reaches `min_similarity`. Embedding a
+    question runs a model, so it and the similarity scan (one matrix-vector
+    product over the cached embeddings) run in a worker thread.
+    """
+
+    def __init__(self, max_entries: int, ttl: float,
+                 embed: Optional[Callable[[str], List[float]]] = None, min_similarity: float = 0.95):
+        self._cache = TTLCache(max_entries, ttl)
+        self.embed = embed
+        self.min_similarity = min_similarity
+        self.similar_hits = 0
+
+    async def get(self, question: str) -> Optional[CypherEntry]:
+        """Exact hit, else a similarity hit (whose answer is dropped, as the question differs)."""
+        key = normalize_question(question)
+        entry = self._cache.get(key)
+        if entry is not None or self.embed is None:
+            return entry
+
+        vector, best = await asyncio.to_thread(self._most_similar, key)
+        if best is None:
+            return None
+        self.similar_hits += 1
+        return best._replace(answer=None, rows_digest=None, embedding=vector)
+
+    async def put(self, question: str, cypher: str, answer: Optional[str], rows_digest: Optional[str],
+                  embedding: Optional[np.ndarray] = None) -> None:
+        key = normalize_question(question)
+        if embedding is None and self.embed is not None:
+            embedding = await asyncio.to_thread(self._embed, key)
+        self._cache.put(key, CypherEntry(cypher, answer, rows_digest, embedding))
+
+    def _embed(self, text: str) -> np.ndarray:
+        vector = np.asarray(self.embed(text), dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _most_similar(self, key: str) -> Tuple[np.ndarray, Optional[CypherEntry]]:
+        """The question's embedding, and the cached entry closest to it if close enough."""
+        vector = self._embed(key)
+        candidates = [entry for _, entry in self._cache.items() if entry.embedding is not None]
+        if not candidates:
+            return vector, None
+        # Embeddings are unit length, so the dot products are the cosine similarities
+        scores = np.stack([entry.embedding for entry in candidates]) @ vector
+        best = int(np.argmax(scores))
+        return vector, candidates[best] if scores[best] >= self.min_similarity else None
+
+    def clear(self) -> None:
+        self._cache.clear()
 
 CYPHER_GENERATION_TEMPLATE = """Task:Generate Cypher statement to query a graph database.
 Instructions:
@@ -76,35 +238,595 @@ cypher_generation_prompt = PromptTemplate(
     input_variables=["schema", "question"],
 )
 
-cypher_chain = GraphCypherQAChain.from_llm(
-    llm,
-    graph=graph,
-    cypher_prompt=cypher_generation_prompt,
-    verbose=True,
-    allow_dangerous_requests=True,
-)
+def load_embeddings() -> Optional[Callable[[str], List[float]]]:
+    """The embedding function for similarity cache hits, if GRAPH_EMBEDDING_MODEL is set."""
+    if not GRAPH_EMBEDDING_MODEL:
+        return None
+    try:
+        from langchain_huggingface import HuggingFaceEmbeddings
+    except ImportError:
+        print("⚠️ GRAPH_EMBEDDING_MODEL is set but langchain-huggingface is not installed; "
+              "similarity cache hits are disabled", file=sys.stderr)
+        return None
+    return HuggingFaceEmbeddings(model_name=GRAPH_EMBEDDING_MODEL).embed_query
+
+
+cypher_cache = CypherCache(GRAPH_CYPHER_CACHE_SIZE, GRAPH_CYPHER_CACHE_TTL, None, GRAPH_CACHE_SIMILARITY)
+result_cache = TTLCache(GRAPH_RESULT_CACHE_SIZE, GRAPH_RESULT_CACHE_TTL)
+
+
+def rows_digest(rows: List[Dict[str, Any]]) -> str:
+    return hashlib.sha1(json.dumps(rows, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def schema_signature(graph: Neo4jGraph) -> Dict[str, Any]:
+    """A cheap fingerprint of the graph's shape, from the count store."""
+    row = graph.query(SCHEMA_SIGNATURE_QUERY)[0]
+    return {
+        "labels": sorted(row["labels"]),
+        "rel_types": sorted(row["rel_types"]),
+        "property_keys": row["property_keys"],
+    }
+
+
+class SchemaSnapshot:
+    """The structured schema of one database saved as JSON, with the signature it was read at."""
+
+    def __init__(self, path: str, source: str):
+        self.path = path
+        self.source = source
+
+    def load(self, signature: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """The saved structured schema, if it was saved for this database at this signature."""
+        if not self.path:
+            return None
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if (snapshot.get("version") != SCHEMA_SNAPSHOT_VERSION
+                or snapshot.get("source") != self.source
+                or snapshot.get("signature") != signature):
+            return None
+        return snapshot.get("structured_schema")
+
+    def save(self, signature: Dict[str, Any], structured_schema: Dict[str, Any]) -> None:
+        if not self.path:
+            return
+        payload = json.dumps({
+            "version": SCHEMA_SNAPSHOT_VERSION,
+            "source": self.source,
+            "signature": signature,
+            "structured_schema": structured_schema,
+        }, default=str)
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(self.path) or ".", suffix=".tmp")
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    f.write(payload)
+                os.replace(tmp_path, self.path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+        except OSError as e:
+            print(f"⚠️ Could not save the schema snapshot: {e}", file=sys.stderr)
+
+
+def schema_words(name: str) -> List[str]:
+    """Lowercase words in a label, type or property name: "RELEASED_BY" -> ["released", "by"], "modelName" -> ["model", "name"]."""
+    return [word.lower() for word in re.findall(r"[A-Z]?[a-z0-9]+|[A-Z]+(?![a-z])", name)]
+
+
+def word_stem(word: str) -> str:
+    """Crude singular form, so "models" in a question matches the Model label."""
+    for suffix in ("ies", "es", "s"):
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            return word[:-len(suffix)] + ("y" if suffix == "ies" else "")
+    return word
+
+
+def prune_schema(structured_schema: Dict[str, Any], question: str) -> Optional[Dict[str, Any]]:
+    """
+    The part of the schema relevant to a question, or None if nothing in it matched.
+
+    A label or relationship type is relevant if the question mentions its name
+    or one of its property names. The result keeps those, every relationship
+    touching a relevant label, and the labels at the other end of those
+    relationships, so the model can still write one-hop paths.
+    """
+    question_words = {word_stem(word) for word in re.findall(r"[a-z0-9]+", question.lower())}
+
+    def mentioned(name: str, props: List[Dict[str, Any]]) -> bool:
+        names = [name] + [prop["property"] for prop in props]
+        return any(word_stem(word) in question_words for n in names for word in schema_words(n))
+
+    node_props = structured_schema.get("node_props", {})
+    rel_props = structured_schema.get("rel_props", {})
+    relationships = structured_schema.get("relationships", [])
+
+    labels = {label for label, props in node_props.items() if mentioned(label, props)}
+    rel_types = {rel_type for rel_type, props in rel_props.items() if mentioned(rel_type, props)}
+    rel_types |= {rel["type"] for rel in relationships if mentioned(rel["type"], [])}
+    if not labels and not rel_types:
+        return None
+
+    kept = [rel for rel in relationships
+            if rel["type"] in rel_types or rel["start"] in labels or rel["end"] in labels]
+    labels |= {rel["start"] for rel in kept} | {rel["end"] for rel in kept}
+    rel_types |= {rel["type"] for rel in kept}
+    return {
+        **structured_schema,
+        "node_props": {label: props for label, props in node_props.items() if label in labels},
+        "rel_props": {rel_type: props for rel_type, props in rel_props.items() if rel_type in rel_types},
+        "relationships": kept,
+    }
+
+
+class GraphBackend:
+    """
+    The LLM, the Neo4j connection and the QA chain built on them.
+
+    Construction is slow and can fail: Neo4jGraph connects and reads the
+    schema. Build it through LazyBackend rather than at import time.
+
+    Neo4jGraph (a blocking driver) is only used to read the schema. Questions
+    are answered on the event loop: the chain's LLM steps through their
+    async path, and queries through a pooled AsyncDriver opened by `open()`.
+    """
+
+    def __init__(self):
+        self.llm = ChatGroq(
+            model="deepseek-r1-distill-llama-70b",
+            api_key=os.getenv("GROQ_API_KEY"),
+            temperature=0,
+            max_tokens=None,
+            reasoning_format="parsed",
+            timeout=None,
+            max_retries=2
+        )
+
+        # The schema is read below, from the snapshot if the graph hasn't changed shape
+        self.graph = Neo4jGraph(
+            url=os.getenv('NEO4J_URI'),
+            username=os.getenv('NEO4J_USERNAME'),
+            password=os.getenv('NEO4J_PASSWORD'),
+            refresh_schema=False
+        )
+        # Neo4jGraph already holds an open driver; don't leak it if the rest fails
+        try:
+            self.schema_snapshot = SchemaSnapshot(
+                GRAPH_SCHEMA_SNAPSHOT_PATH, f"{os.getenv('NEO4J_URI')}|{os.getenv('NEO4J_USERNAME')}"
+            )
+            self._schema_signature = schema_signature(self.graph)
+            cached_schema = self.schema_snapshot.load(self._schema_signature)
+            if cached_schema is not None:
+                self.set_schema(cached_schema)
+            else:
+                self.graph.refresh_schema()
+                self.schema_snapshot.save(self._schema_signature, self.graph.structured_schema)
+
+            self.chain = GraphCypherQAChain.from_llm(
+                self.llm,
+                graph=self.graph,
+                cypher_prompt=cypher_generation_prompt,
+                verbose=True,
+                allow_dangerous_requests=True,
+            )
+
+            if cypher_cache.embed is None:
+                cypher_cache.embed = load_embeddings()
+
+            self._schema_lock = threading.Lock()
+            self._schema_checked_at = time.monotonic()
+            self._schema_digest = hashlib.sha1(self.graph.schema.encode()).hexdigest()
+        except BaseException:
+            self.graph.close()
+            raise
+
+        self.database = os.getenv('NEO4J_DATABASE', 'neo4j')
+        self.driver: Optional[AsyncDriver] = None
+        self.slots: Optional[asyncio.Semaphore] = None
+
+    async def open(self) -> None:
+        """Connect the async driver; called on the event loop that will use it."""
+        self.driver = AsyncGraphDatabase.driver(
+            os.getenv('NEO4J_URI'),
+            auth=(os.getenv('NEO4J_USERNAME'), os.getenv('NEO4J_PASSWORD')),
+            max_connection_pool_size=GRAPH_POOL_SIZE,
+            connection_acquisition_timeout=GRAPH_POOL_ACQUIRE_TIMEOUT,
+        )
+        await self.driver.verify_connectivity()
+        self.slots = asyncio.Semaphore(GRAPH_MAX_CONCURRENCY)
+
+    async def close(self) -> None:
+        """Close both drivers: the async one for queries and Neo4jGraph's for the schema."""
+        try:
+            if self.driver is not None:
+                await self.driver.close()
+        finally:
+            self.graph.close()
+
+    def set_schema(self, structured_schema: Dict[str, Any]) -> None:
+        """Use a structured schema read earlier instead of asking Neo4j for it."""
+        self.graph.structured_schema = structured_schema
+        self.graph.schema = format_schema(structured_schema, is_enhanced=False)
+
+    def prompt_schema(self, question: str) -> str:
+        """The schema text for the Cypher generation prompt: pruned to the question if possible."""
+        if GRAPH_SCHEMA_PRUNE:
+            pruned = prune_schema(self.graph.structured_schema, question)
+            if pruned is not None:
+                return format_schema(pruned, is_enhanced=False)
+        return self.graph.schema
 
+    async def check_schema(self) -> None:
+        """
+        Compare the schema signature every GRAPH_SCHEMA_CHECK_SECONDS. If it
+        changed, re-read the schema, save it, and clear both caches if the
+        schema text differs.
+        """
+        if time.monotonic() - self._schema_checked_at >= GRAPH_SCHEMA_CHECK_SECONDS:
+            await asyncio.to_thread(self._refresh_schema_if_changed)
 
+    def _refresh_schema_if_changed(self) -> None:
+        with self._schema_lock:
+            if time.monotonic() - self._schema_checked_at < GRAPH_SCHEMA_CHECK_SECONDS:
+                return
+            signature = schema_signature(self.graph)
+            if signature == self._schema_signature:
+                self._schema_checked_at = time.monotonic()
+                return
+            self.graph.refresh_schema()
+            self.schema_snapshot.save(signature, self.graph.structured_schema)
+            self._schema_signature = signature
+            digest = hashlib.sha1(self.graph.schema.encode()).hexdigest()
+            if digest != self._schema_digest:
+                cypher_cache.clear()
+                result_cache.clear()
+                self._schema_digest = digest
+            self._schema_checked_at = time.monotonic()
+
+    async def run_query(self, cypher: str, params: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """Run Cypher through the level-2 result cache, fetching at most the chain's top_k rows."""
+        key = (cypher, json.dumps(params or {}, sort_keys=True, default=str))
+        rows = result_cache.get(key)
+        if rows is None:
+            async with self.driver.session(database=self.database) as session:
+                result = await session.run(Query(cypher, timeout=GRAPH_QUERY_TIMEOUT), params or {})
+                rows = [record.data() for record in await result.fetch(self.chain.top_k)]
+            result_cache.put(key, rows)
+        return rows
+
+    async def answer_question(self, question: str) -> Dict[str, Any]:
+        """
+        Answer a question the way GraphCypherQAChain does (generate Cypher, run it,
+        phrase the rows as an answer), skipping each step whose result is cached.
+
+        A repeated question whose rows haven't changed is answered without any
+        LLM call; if only the rows changed, just the answer is regenerated.
+        """
+        await self.check_schema()
+
+        entry = await cypher_cache.get(question)
+        if entry is not None:
+            cypher = entry.cypher
+        else:
+            generated = await self.chain.cypher_generation_chain.ainvoke(
+                {"question": question, "schema": self.prompt_schema(question)}
+            )
+            cypher = extract_cypher(generated)
+            print(f"Generated Cypher: {cypher}", file=sys.stderr)
+
+        rows = await self.run_query(cypher) if cypher else []
+        digest = rows_digest(rows)
+
+        if entry is not None and entry.answer is not None and entry.rows_digest == digest:
+            answer = entry.answer
+        else:
+            answer = await self.chain.qa_chain.ainvoke({"question": question, "context": rows})
+
+        await cypher_cache.put(question, cypher, answer, digest, entry.embedding if entry else None)
+        return {"query": question, "result": answer}
+
+
+class CypherCursor:
+    """
+    An open read-only transaction whose records are handed out a page at a time.
+
+    The driver pulls records from the server in batches of the page size, so
+    only the pages actually asked for are ever transferred.
+    """
+
+    def __init__(self, session: AsyncSession, tx: AsyncTransaction, result: AsyncResult):
+        self.session = session
+        self.tx = tx
+        self.result = result
+        self.expires_at = time.monotonic() + GRAPH_CURSOR_TTL
+
+    @classmethod
+    async def open(cls, backend: "GraphBackend", query: str, params: Dict[str, Any],
+                   page_size: int) -> "CypherCursor":
+        session = backend.driver.session(
+            database=backend.database, default_access_mode=READ_ACCESS, fetch_size=page_size
+        )
+        try:
+            # The server enforces read access: a write fails instead of running.
+            # The transaction timeout also ends cursors that are never read to the end.
+            tx = await session.begin_transaction(timeout=GRAPH_CURSOR_TTL)
+            result = await tx.run(query, params)
+        except BaseException:
+            await session.close()
+            raise
+        return cls(session, tx, result)
+
+    async def next_page(self, size: int) -> Tuple[List[Dict[str, Any]], bool]:
+        """The next `size` rows, and whether any rows remain after them."""
+        records = await self.result.fetch(size)
+        more = await self.result.peek() is not None
+        return [record.data() for record in records], more
+
+    async def close(self) -> None:
+        try:
+            await self.tx.close()
+        finally:
+            await self.session.close()
+
+
+class CursorRegistry:
+    """
+    Open CypherCursors by id, closing the oldest beyond `max_open` and any past
+    their expiry.
+
+    Expired cursors are also closed by a background sweep every
+    `sweep_interval` seconds while any are open, so an abandoned cursor gives
+    its connection back without waiting for the server's transaction timeout.
+    """
+
+    def __init__(self, max_open: int, sweep_interval: float):
+        self.max_open = max_open
+        self.sweep_interval = sweep_interval
+        self._cursors: "OrderedDict[str, CypherCursor]" = OrderedDict()
+        self._sweeper: Optional[asyncio.Task] = None
+
+    async def add(self, cursor: CypherCursor) -> str:
+        await self.sweep()
+        while len(self._cursors) >= self.max_open:
+            _, oldest = self._cursors.popitem(last=False)
+            await oldest.close()
+        cursor_id = uuid.uuid4().hex
+        self._cursors[cursor_id] = cursor
+        if self._sweeper is None or self._sweeper.done():
+            self._sweeper = asyncio.get_running_loop().create_task(self._sweep_while_open())
+        return cursor_id
+
+    async def take(self, cursor_id: str) -> Optional[CypherCursor]:
+        """Remove and return a cursor; it is put back with `add` if it has more pages."""
+        await self.sweep()
+        return self._cursors.pop(cursor_id, None)
+
+    async def sweep(self) -> None:
+        now = time.monotonic()
+        # Remove them all before the first await, so a concurrent take() can't race the closes
+        expired = [self._cursors.pop(cid) for cid, cursor in list(self._cursors.items())
+                   if cursor.expires_at < now]
+        for cursor in expired:
+            await cursor.close()
+
+    async def _sweep_while_open(self) -> None:
+        while self._cursors:
+            await asyncio.sleep(self.sweep_interval)
+            try:
+                await self.sweep()
+            except Exception as e:
+                print(f"⚠️ Closing an expired cursor failed: {e}", file=sys.stderr)
+
+
+cypher_cursors = CursorRegistry(GRAPH_MAX_CURSORS, sweep_interval=min(10.0, GRAPH_CURSOR_TTL))
+
+
+class LazyBackend:
+    """
+    Builds the backend once, in a worker thread, the first time it is needed.
+
+    `start()` kicks the build off without waiting (the server calls it on
+    startup); `get()` waits for it, so tool calls made while the backend is
+    still starting are queued rather than failing. If the build fails,
+    callers get the error, and the next call after `retry_after` seconds
+    tries again.
+    """
+
+    def __init__(self, factory: Callable[[], GraphBackend], retry_after: float):
+        self.factory = factory
+        self.retry_after = retry_after
+        self.status = "idle"  # idle -> starting -> ready | failed
+        self.error: Optional[BaseException] = None
+        self._backend: Optional[GraphBackend] = None
+        self._task: Optional[asyncio.Task] = None
+        self._failed_at = 0.0
+
+    def start(self) -> "asyncio.Task":
+        """Start building the backend if it isn't built or being built already."""
+        retry_due = self.status == "failed" and time.monotonic() - self._failed_at >= self.retry_after
+        if self._task is None or retry_due:
+            self.status = "starting"
+            self._task = asyncio.get_running_loop().create_task(self._build())
+            self._task.add_done_callback(self._report)
+        return self._task
+
+    async def get(self) -> GraphBackend:
+        if self._backend is not None:
+            return self._backend
+        # Shielded so a cancelled tool call doesn't cancel the build other calls wait on
+        return await asyncio.shield(self.start())
+
+    async def _build(self) -> GraphBackend:
+        try:
+            backend = await asyncio.to_thread(self.factory)
+            try:
+                await backend.open()
+            except Exception:
+                await backend.close()
+                raise
+            self._backend = backend
+        except Exception as e:
+            self.status, self.error, self._failed_at = "failed", e, time.monotonic()
+            raise
+        self.status, self.error = "ready", None
+        return self._backend
+
+    def _report(self, task: "asyncio.Task") -> None:
+        # Retrieving the exception here also keeps asyncio from warning that nobody did
+        if not task.cancelled() and task.exception() is not None:
+            print(f"❌ Graph backend failed to start: {task.exception()}", file=sys.stderr)
+        elif not task.cancelled():
+            print("✅ Graph backend ready", file=sys.stderr)
+
+
+graph_backend = LazyBackend(GraphBackend, GRAPH_STARTUP_RETRY_SECONDS)
+
+
+async def answer_in_turn(backend: GraphBackend, question: str) -> Dict[str, Any]:
+    """Wait for one of the GRAPH_MAX_CONCURRENCY slots, then answer."""
+    async with backend.slots:
+        return await backend.answer_question(question)
+
+
+@mcp.tool()
+async def get_data_on_llm(query: str) -> str:
+    """
+    Get the information on LLM releted questions.
+
+    This tool provides information on the query related to llm.
+
+    Args:
+        Query: The question asked by the user.
+    
+    Returns:
+        A formatted string with answer to the given query
+    Example:
+        get_data_on_llm("what are the actions in llm?") returns response in string format.
+    """
+    try:
+        backend = await graph_backend.get()
+        return await asyncio.wait_for(answer_in_turn(backend, query), GRAPH_REQUEST_TIMEOUT)
+    except asyncio.TimeoutError:
+        return f"Error occured: no answer within {GRAPH_REQUEST_TIMEOUT:g}s"
+    except Exception as e:
+        return f"Error occured {e}"
+
+
+@mcp.tool()
+async def run_cypher(query: str = "", params: Optional[Dict[str, Any]] = None, limit: int = 100,
+                     cursor: Optional[str] = None) -> str:
+    """
+    Run a Cypher query directly, skipping Cypher generation, in a read-only transaction.
+
+    Pass values as $parameters in `params` instead of writing them into the
+    query: the database then reuses one cached plan for every call.
+    Rows come back `limit` at a time. When more remain, the response includes
+    a `cursor`; call run_cypher(cursor=...) to get the next page.
+
+    Args:
+        query: The Cypher query, e.g. "MATCH (m:Model) WHERE m.released >= $year RETURN m.name AS name"
+        params: Values for the query's $parameters, e.g. {"year": 2023}
+        limit: Rows per page (1-1000 by default)
+        cursor: A cursor from an earlier page; continues that query (query and params are ignored)
+
+    Returns:
+        JSON with the page's "rows" and, if more rows remain, a "cursor" for the next page
+    Example:
+        run_cypher("MATCH (o:Organization) RETURN o.name AS name", limit=50)
+    """
+    if not 1 <= limit <= GRAPH_MAX_PAGE_SIZE:
+        return f"Error occured: limit must be between 1 and {GRAPH_MAX_PAGE_SIZE}"
+    if not query.strip() and not cursor:
+        return "Error occured: give a query, or a cursor from an earlier page"
+
+    try:
+        backend = await graph_backend.get()
+    except Exception as e:
+        return f"Error occured {e}"
+    # Direct queries share the GRAPH_MAX_CONCURRENCY slots with questions
+    try:
+        await asyncio.wait_for(backend.slots.acquire(), GRAPH_QUERY_TIMEOUT)
+    except asyncio.TimeoutError:
+        return f"Error occured: server busy, no query slot within {GRAPH_QUERY_TIMEOUT:g}s"
+    try:
+        return await read_page(backend, query, params or {}, limit, cursor)
+    finally:
+        backend.slots.release()
+
+
+async def read_page(backend: GraphBackend, query: str, params: Dict[str, Any], limit: int,
+                    cursor: Optional[str]) -> str:
+    """The next page of run_cypher rows as JSON, opening the cursor first for a new query."""
+    try:
+        if cursor:
+            open_cursor = await cypher_cursors.take(cursor)
+            if open_cursor is None:
+                return "Error occured: unknown or expired cursor; run the query again"
+        else:
+            open_cursor = await asyncio.wait_for(
+                CypherCursor.open(backend, query, params, limit), GRAPH_QUERY_TIMEOUT
+            )
+    except asyncio.TimeoutError:
+        return f"Error occured: query did not start within {GRAPH_QUERY_TIMEOUT:g}s"
+    except Exception as e:
+        return f"Error occured {e}"
+
+    try:
+        rows, more = await asyncio.wait_for(open_cursor.next_page(limit), GRAPH_QUERY_TIMEOUT)
+        page: Dict[str, Any] = {"rows": rows}
+        if more:
+            page["cursor"] = await cypher_cursors.add(open_cursor)
+            open_cursor = None
+        return json.dumps(page, indent=2, default=str, ensure_ascii=False)
+    except asyncio.TimeoutError:
+        return f"Error occured: no rows within {GRAPH_QUERY_TIMEOUT:g}s"
+    except Exception as e:
+        return f"Error occured {e}"
+    finally:
+        # Finished, failed or cancelled: end the transaction and free the connection
+        if open_cursor is not None:
+            await open_cursor.close()
+
+
+@mcp.resource("neo4j://status")
+def get_backend_status() -> str:
+    """Whether the Neo4j and LLM backend is ready to answer questions."""
+    if graph_backend.status == "ready":
+        return "✅ ready"
+    if graph_backend.status == "failed":
+        return f"❌ failed: {graph_backend.error} (retried on the next question)"
+    return "⏳ starting: questions asked now are answered once it is ready"
 
 
 if __name__ == "__main__":
-    print(" neo4j Assistant MCP Server Starting...")
-    print("=" * 50)
-    print(" Server will run on stdio (for Claude Desktop)")
-    print(" Available cities: New York, London, Tokyo, San Francisco")
-    print(" Available tools:")
-    print("   • get_current_neo4j(city)")
-    print("   • get_neo4j_forecast(city, days)")
-    print("   • compare_neo4j(city1, city2)")
-    print(" Available resources:")
-    print("   • neo4j://cities")
-    print(" Available prompts:")
-    print("   • neo4j_assistant_prompt")
-    print("\n To use with Claude Desktop:")
-    print("   1. Add server to Claude Desktop config")
-    print("   2. Restart Claude Desktop")
-    print("   3. Ask about neo4j in any supported city")
-    print("\n Starting server...")
+    parser = argparse.ArgumentParser(description="neo4j Assistant MCP server")
+    parser.add_argument("--transport", default="stdio", choices=["stdio", "streamable-http"])
+    parser.add_argument("--host", default=mcp.settings.host)
+    parser.add_argument("--port", type=int, default=mcp.settings.port)
+    args = parser.parse_args()
+    mcp.settings.host = args.host
+    mcp.settings.port = args.port
+
+    where = "stdio (for Claude Desktop)" if args.transport == "stdio" else f"http://{args.host}:{args.port}{mcp.settings.streamable_http_path}"
+    # Startup messages go to stderr: on the stdio transport, stdout carries the protocol
+    print(" neo4j Assistant MCP Server Starting...", file=sys.stderr)
+    print("=" * 50, file=sys.stderr)
+    print(f" Server will run on {where}", file=sys.stderr)
+    print(" Available tools:", file=sys.stderr)
+    print("   • get_data_on_llm(query)", file=sys.stderr)
+    print("   • run_cypher(query, params, limit, cursor)", file=sys.stderr)
+    print(" Available resources:", file=sys.stderr)
+    print("   • neo4j://status", file=sys.stderr)
+    print("\n To use with Claude Desktop:", file=sys.stderr)
+    print("   1. Add server to Claude Desktop config", file=sys.stderr)
+    print("   2. Restart Claude Desktop", file=sys.stderr)
+    print("   3. Ask questions about the data in your Neo4j graph", file=sys.stderr)
+    print("\n Starting server...", file=sys.stderr)
     
-    # Run the server using stdio transport (standard for Claude Desktop)
-    mcp.run(transport="stdio")
+    # stdio is the standard transport for Claude Desktop
+    mcp.run(transport=args.transport)
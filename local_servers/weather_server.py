@@ -1,11 +1,25 @@
 
 
+import argparse
 import asyncio
+import atexit
+import csv
+from array import array
+import heapq
 import json
-from typing import Dict, Any, Optional
+import math
+import os
+import sys
+import tempfile
+import time
+import weakref
+from typing import Dict, Any, Optional, List, NamedTuple, Tuple, Callable, Awaitable
 from datetime import datetime, timedelta
-import requests
+from urllib.parse import quote
+import anyio
+import httpx
 from mcp.server.fastmcp import FastMCP
+from mcp.server.session import ServerSession
 from mcp.shared.exceptions import McpError
 from mcp.types import ErrorData, INTERNAL_ERROR, INVALID_PARAMS
 
@@ -61,8 +75,1215 @@ MOCK_WEATHER_DATA = {
     }
 }
 
+# Coordinates and alternative names for the cities above. A larger gazetteer
+# can be loaded from WEATHER_GAZETTEER_PATH (see load_gazetteer_csv)
+MOCK_CITY_GAZETTEER = [
+    {"name": "New York", "lat": 40.7128, "lon": -74.0060, "aliases": ["NYC", "New York City"]},
+    {"name": "London", "lat": 51.5074, "lon": -0.1278, "aliases": []},
+    {"name": "Tokyo", "lat": 35.6762, "lon": 139.6503, "aliases": ["Tōkyō"]},
+    {"name": "San Francisco", "lat": 37.7749, "lon": -122.4194, "aliases": ["SF", "San Fran"]},
+]
+
+# Weather provider configuration
+# WEATHER_PROVIDER selects where weather data comes from:
+#   "mock" (default) - the MOCK_WEATHER_DATA dict above
+#   "http"           - an HTTP weather API at WEATHER_API_URL (see HttpWeatherProvider)
+WEATHER_PROVIDER = os.getenv("WEATHER_PROVIDER", "mock")
+WEATHER_API_URL = os.getenv("WEATHER_API_URL", "http://localhost:8081")
+WEATHER_API_KEY = os.getenv("WEATHER_API_KEY", "")
+WEATHER_HTTP_TIMEOUT = float(os.getenv("WEATHER_HTTP_TIMEOUT", "10"))
+
+# Upper bound on simultaneous upstream requests (also the connection pool size)
+WEATHER_MAX_CONCURRENCY = int(os.getenv("WEATHER_MAX_CONCURRENCY", "20"))
+
+# How long a fetched weather report is served from cache, in seconds
+WEATHER_CACHE_TTL = float(os.getenv("WEATHER_CACHE_TTL", "300"))
+
+# For how long past the TTL a report is still served (marked stale) while it is
+# refreshed in the background, in seconds
+WEATHER_STALE_TTL = float(os.getenv("WEATHER_STALE_TTL", "3600"))
+
+# After a failed fetch, serve the cached report without retrying for this long
+WEATHER_RETRY_AFTER = float(os.getenv("WEATHER_RETRY_AFTER", "30"))
+
+# Where the cache is snapshotted so a restarted server can answer immediately
+# (set WEATHER_SNAPSHOT_PATH to an empty string to disable)
+WEATHER_SNAPSHOT_PATH = os.path.expanduser(
+    os.getenv("WEATHER_SNAPSHOT_PATH", "~/.cache/weather-mcp/snapshot.json")
+)
+WEATHER_SNAPSHOT_INTERVAL = float(os.getenv("WEATHER_SNAPSHOT_INTERVAL", "30"))
+
+# Bump when the snapshot layout changes; older snapshots are ignored
+SNAPSHOT_VERSION = 1
+
+# How often the list of supported cities is re-read from the provider, in seconds
+WEATHER_CITIES_REFRESH = float(os.getenv("WEATHER_CITIES_REFRESH", "300"))
+
+CITIES_RESOURCE_URI = "weather://cities"
+
+# Background prefetch: every WEATHER_PREFETCH_INTERVAL seconds, refresh the
+# WEATHER_PREFETCH_TOP_N most requested cities before their cache entries
+# expire, using at most WEATHER_PREFETCH_BUDGET upstream calls per minute.
+# Request counts halve every WEATHER_PREFETCH_HALF_LIFE seconds.
+# Set WEATHER_PREFETCH_TOP_N=0 to disable.
+WEATHER_PREFETCH_TOP_N = int(os.getenv("WEATHER_PREFETCH_TOP_N", "20"))
+WEATHER_PREFETCH_INTERVAL = float(os.getenv("WEATHER_PREFETCH_INTERVAL", "30"))
+WEATHER_PREFETCH_BUDGET = float(os.getenv("WEATHER_PREFETCH_BUDGET", "60"))
+WEATHER_PREFETCH_HALF_LIFE = float(os.getenv("WEATHER_PREFETCH_HALF_LIFE", "3600"))
+
+# Maximum number of cities accepted by one get_weather_batch call
+WEATHER_BATCH_MAX_CITIES = 100
+
+# Longest forecast get_weather_forecast accepts, in days (providers may have fewer)
+FORECAST_MAX_DAYS = 16
+
+# Longest window get_forecast_range and get_forecast_stats accept, in steps
+FORECAST_MAX_WINDOW = 24 * FORECAST_MAX_DAYS
+
+# Numeric forecast columns per horizon; the first is the default for get_forecast_stats
+FORECAST_FIELDS = {"daily": ("high", "low"), "hourly": ("temp",)}
+
+# Optional CSV of extra cities (columns: name, lat, lon and optionally aliases
+# separated by "|"), merged into the built-in gazetteer at startup
+WEATHER_GAZETTEER_PATH = os.getenv("WEATHER_GAZETTEER_PATH", "")
+
+# Fuzzy-match score (Dice coefficient of trigrams) at which a known city is
+# offered as a "Did you mean" suggestion for a name the provider doesn't know
+GAZETTEER_SUGGEST_SCORE = 0.4
+
+# Unknown-city errors list every supported city only up to this many
+CITY_HINT_MAX = 20
+
+# How many of the nearest cities get_weather_near tries before giving up
+NEAR_MAX_CANDIDATES = 10
+
+# Mean Earth radius, for great-circle distances
+EARTH_RADIUS_KM = 6371.0
+
+# Timestamp format shown at the bottom of markdown responses
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# Markdown templates for the tool responses, filled in with str.format
+CURRENT_WEATHER_TEMPLATE = """🌤️ **Current Weather in {city}**
+
+🌡️ **Temperature**: {temperature}°C
+☁️ **Condition**: {condition}
+💧 **Humidity**: {humidity}%
+💨 **Wind Speed**: {wind_speed} km/h
+
+*Last updated: {updated}*{staleness}"""
+
+# Fields of a provider report shown as current conditions
+CONDITION_FIELDS = ("temperature", "condition", "humidity", "wind_speed")
+
+# Appended to markdown responses when the data isn't fresh
+STALENESS_NOTES = {
+    "stale": "\n⚠️ *Cached data from {age} ago; a refresh is in progress*",
+    "offline": "\n⚠️ *Weather service unavailable; showing cached data from {age} ago*",
+}
+
+FORECAST_TEMPLATE = """📅 **{days}-Day Weather Forecast for {city}**
+
+{forecast_days}{note}*Forecast generated: {updated}*{staleness}"""
+
+FORECAST_SHORT_NOTE = "⚠️ Only {available} days of forecast are available for {city}.\n\n"
+
+FORECAST_RANGE_TEMPLATE = """📈 **{horizon} Forecast for {city}** (steps {first}-{last} of {total})
+
+{header}
+{rows}
+
+*Forecast generated: {updated}*{staleness}"""
+
+FORECAST_RANGE_HEADERS = {
+    "daily": "| Date | High °C | Low °C | Condition |\n|---|---|---|---|",
+    "hourly": "| Time | Temp °C | Condition |\n|---|---|---|",
+}
+
+FORECAST_RANGE_ROWS = {
+    "daily": "| {date} | {high} | {low} | {condition} |",
+    "hourly": "| {date} | {temp} | {condition} |",
+}
+
+FORECAST_STATS_TEMPLATE = """📊 **{horizon} {field} over steps {first}-{last}**
+
+| City | Min | Max | Mean | Steps |
+|---|---|---|---|---|
+{rows}"""
+
+FORECAST_STATS_ROW_TEMPLATE = "| {city} | {min:g} | {max:g} | {mean:g} | {steps} |"
+
+FORECAST_DAY_TEMPLATE = """**{day}**
+   🌡️ High: {high}°C | Low: {low}°C
+   ☁️ Condition: {condition}
+
+"""
+
+COMPARISON_TEMPLATE = """⚖️ **Weather Comparison: {name1} vs {name2}**
+
+📊 **Temperature**
+   • {name1}: {w1[temperature]}°C
+   • {name2}: {w2[temperature]}°C
+   • {temp_comparison}
+
+☁️ **Conditions**
+   • {name1}: {w1[condition]}
+   • {name2}: {w2[condition]}
+
+💧 **Humidity**
+   • {name1}: {w1[humidity]}%
+   • {name2}: {w2[humidity]}%
+
+💨 **Wind Speed**
+   • {name1}: {w1[wind_speed]} km/h
+   • {name2}: {w2[wind_speed]} km/h
+
+*Comparison made: {updated}*{staleness}"""
+
+BATCH_TEMPLATE = """🌍 **Current Weather for {count} Cities**
+
+| City | Condition | Temp °C | Humidity % | Wind km/h |
+|---|---|---|---|---|
+{rows}
+
+*{succeeded} succeeded, {failed} failed · {updated}*"""
+
+BATCH_ROW_TEMPLATE = "| {city} | {condition} | {temperature} | {humidity} | {wind_speed} |"
+
+BATCH_ERROR_ROW_TEMPLATE = "| {city} | ❌ {error} | | | |"
+
+NEAR_TEMPLATE = """{current}
+
+📍 *{distance} km from {lat}, {lon}*"""
+
+CITIES_TEMPLATE = """🏙️ **Available Cities for Weather Data**
+
+{city_lines}
+*Total: {count} cities available*
+*Data last updated: {updated}*"""
+
+WEATHER_PROMPT_TEMPLATE = """You are a helpful weather assistant with access to weather information tools. 
+
+                **Your capabilities include:**
+
+                 **Current Weather**: Use `get_current_weather(city)` to get current conditions
+                 **Forecasts**: Use `get_weather_forecast(city, days)` for multi-day predictions  
+                 **Forecast Details**: Use `get_forecast_range` for daily/hourly windows and `get_forecast_stats` for min/max/mean across cities
+                 **Comparisons**: Use `compare_weather(city1, city2)` to compare conditions
+                 **Many Cities**: Use `get_weather_batch(cities)` to look up several cities in one call
+                 **Nearby**: Use `get_weather_near(lat, lon)` for the closest city to a location
+                 **Available Cities**: Reference the `weather://cities` resource for supported locations
+
+                **Available cities**: {cities}
+
+                **Tips for great weather assistance:**
+                - Always provide specific, actionable information
+                - Include relevant details like temperature, conditions, and humidity
+                - Suggest appropriate clothing or activities based on conditions
+                - Offer comparisons when helpful
+                - Be conversational and helpful in your responses
+
+                Please help users with their weather-related questions using these tools!
+            """
+
+
+class CityNotFoundError(Exception):
+    """Raised by a provider when it has no weather data for a city."""
+
+
+class WeatherProvider:
+    """
+    Base class for weather data sources.
+
+    A provider returns one report per city, shaped like the entries of
+    MOCK_WEATHER_DATA: temperature, condition, humidity, wind_speed and forecast.
+    A report may also carry an hourly forecast in columnar form:
+    {"start": ISO timestamp, "temp": [...], "condition": [...]}.
+    """
+
+    name = "base"
+
+    async def fetch(self, city_key: str) -> Dict[str, Any]:
+        """Fetch the weather report for a normalized city name."""
+        raise NotImplementedError
+
+    async def cities(self) -> List[str]:
+        """List the cities this provider knows about (may be empty if unknown)."""
+        return []
+
+    async def aclose(self) -> None:
+        """Release connections; called when the server shuts down."""
+
+
+class MockWeatherProvider(WeatherProvider):
+    """Serves the built-in MOCK_WEATHER_DATA, for demos and tests."""
+
+    name = "mock"
+
+    def __init__(self, data: Dict[str, Dict[str, Any]]):
+        self.data = data
+
+    async def fetch(self, city_key: str) -> Dict[str, Any]:
+        if city_key not in self.data:
+            raise CityNotFoundError(city_key)
+        report = self.data[city_key]
+        if "hourly" not in report:
+            report = {**report, "hourly": mock_hourly_forecast(report["forecast"])}
+        return report
+
+    async def cities(self) -> List[str]:
+        return list(self.data.keys())
+
+
+class HttpWeatherProvider(WeatherProvider):
+    """
+    Fetches weather from an HTTP API without blocking the event loop.
+
+    All requests share one pooled httpx.AsyncClient (keep-alive, and HTTP/2 when
+    the `h2` package is installed), and a semaphore caps the number of requests
+    in flight at WEATHER_MAX_CONCURRENCY.
+
+    Expected endpoints (see weather_stub_upstream.py for a local stub):
+        GET {base_url}/weather/{city}  -> JSON report, 404 if the city is unknown
+        GET {base_url}/cities          -> JSON list of city names
+    """
+
+    name = "http"
+
+    def __init__(self, base_url: str, api_key: str = "", timeout: float = 10,
+                 max_concurrency: int = 20):
+        self.base_url = base_url.rstrip("/")
+        self.api_key = api_key
+        self.timeout = timeout
+        self.max_concurrency = max_concurrency
+        self._client: Optional[httpx.AsyncClient] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        # The client and semaphore belong to the event loop that created them
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._loop is not loop:
+            self._discard_client()
+            try:
+                import h2  # noqa: F401  (enables HTTP/2 in httpx)
+                http2 = True
+            except ImportError:
+                http2 = False
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                http2=http2,
+                timeout=self.timeout,
+                headers={"Authorization": f"Bearer {self.api_key}"} if self.api_key else None,
+                limits=httpx.Limits(
+                    max_connections=self.max_concurrency,
+                    max_keepalive_connections=self.max_concurrency,
+                ),
+            )
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._loop = loop
+        return self._client
+
+    def _discard_client(self) -> None:
+        """Close the client of a previous event loop on that loop, if it is still open."""
+        client, loop = self._client, self._loop
+        self._client = None
+        if client is not None and loop is not None and not loop.is_closed():
+            asyncio.run_coroutine_threadsafe(client.aclose(), loop)
+
+    async def aclose(self) -> None:
+        client, self._client = self._client, None
+        if client is not None:
+            await client.aclose()
+
+    async def _get(self, path: str) -> httpx.Response:
+        client = self._get_client()
+        async with self._semaphore:
+            return await client.get(path)
+
+    async def fetch(self, city_key: str) -> Dict[str, Any]:
+        response = await self._get(f"/weather/{quote(city_key)}")
+        if response.status_code == 404:
+            raise CityNotFoundError(city_key)
+        response.raise_for_status()
+        return response.json()
+
+    async def cities(self) -> List[str]:
+        try:
+            response = await self._get("/cities")
+            response.raise_for_status()
+            return [str(city).lower() for city in response.json()]
+        except httpx.HTTPError:
+            return []
+
+
+class ForecastSeries:
+    """
+    One city's forecast at a fixed step (daily or hourly), stored column-wise.
+
+    Each field is a typed `array` (4-byte floats for temperatures, 2-byte
+    condition codes) rather than a list of per-step dicts, so a long horizon
+    costs a few bytes per step and windows are slices of contiguous arrays.
+    """
+
+    def __init__(self, start: datetime, step: timedelta, columns: Dict[str, array]):
+        self.start = start
+        self.step = step
+        self.columns = columns
+
+    def __len__(self) -> int:
+        return len(self.columns["condition"])
+
+    def time_at(self, index: int) -> datetime:
+        return self.start + index * self.step
+
+    def window(self, start: int, count: int) -> Dict[str, array]:
+        """Slice every column to steps [start, start + count)."""
+        return {name: column[start:start + count] for name, column in self.columns.items()}
+
+    def aggregate(self, field: str, start: int, count: int) -> Optional[Dict[str, float]]:
+        """Min, max and mean of one numeric column over a window (None if empty)."""
+        values = self.columns[field][start:start + count]
+        if not values:
+            return None
+        return {
+            "min": round(min(values), 1),
+            "max": round(max(values), 1),
+            "mean": round(sum(values) / len(values), 1),
+        }
+
+
+class ForecastStore:
+    """
+    Daily and hourly forecasts for every fetched city, in ForecastSeries form.
+
+    Condition names ("Sunny", "Light Rain", ...) are interned into one shared
+    vocabulary and stored per step as small integer codes.
+    """
+
+    def __init__(self):
+        self._series: Dict[Tuple[str, str], ForecastSeries] = {}
+        self._condition_codes: Dict[str, int] = {}
+        self.conditions: List[str] = []
+
+    def _codes(self, conditions: List[str]) -> array:
+        codes = array('H')
+        for condition in conditions:
+            code = self._condition_codes.get(condition)
+            if code is None:
+                code = self._condition_codes[condition] = len(self.conditions)
+                self.conditions.append(condition)
+            codes.append(code)
+        return codes
+
+    def put(self, city_key: str, data: Dict[str, Any], fetched_at: datetime) -> None:
+        """Store the forecasts from a provider report, replacing older ones."""
+        daily = data.get("forecast") or []
+        self._series[(city_key, "daily")] = ForecastSeries(
+            fetched_at.replace(hour=0, minute=0, second=0, microsecond=0),
+            timedelta(days=1),
+            {
+                "high": array('f', [day["high"] for day in daily]),
+                "low": array('f', [day["low"] for day in daily]),
+                "condition": self._codes([day["condition"] for day in daily]),
+            },
+        )
+
+        hourly = data.get("hourly")
+        if hourly:
+            self._series[(city_key, "hourly")] = ForecastSeries(
+                datetime.fromisoformat(hourly["start"]),
+                timedelta(hours=1),
+                {
+                    "temp": array('f', hourly["temp"]),
+                    "condition": self._codes(hourly["condition"]),
+                },
+            )
+        else:
+            self._series.pop((city_key, "hourly"), None)
+
+    def get(self, city_key: str, horizon: str) -> Optional[ForecastSeries]:
+        return self._series.get((city_key, horizon))
+
+    def export(self, city_key: str) -> Dict[str, Any]:
+        """Convert a city's forecasts back to the provider report layout."""
+        fields: Dict[str, Any] = {}
+        daily = self.get(city_key, "daily")
+        if daily is not None:
+            fields["forecast"] = [
+                {"day": day_label(daily, i), "high": row["high"], "low": row["low"], "condition": row["condition"]}
+                for i, row in enumerate(self.rows(daily, 0, len(daily)))
+            ]
+        hourly = self.get(city_key, "hourly")
+        if hourly is not None:
+            fields["hourly"] = {
+                "start": hourly.start.isoformat(),
+                "temp": [round(value, 1) for value in hourly.columns["temp"]],
+                "condition": [self.conditions[code] for code in hourly.columns["condition"]],
+            }
+        return fields
+
+    def rows(self, series: ForecastSeries, start: int, count: int) -> List[Dict[str, Any]]:
+        """Expand a window of a series into one dict per step, for rendering."""
+        window = series.window(start, count)
+        rows = []
+        for offset, code in enumerate(window["condition"]):
+            row: Dict[str, Any] = {"time": series.time_at(start + offset)}
+            for name, column in window.items():
+                if name != "condition":
+                    row[name] = round(column[offset], 1)
+            row["condition"] = self.conditions[code]
+            rows.append(row)
+        return rows
+
+
+def mock_hourly_forecast(daily: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Derive an hourly series from a daily forecast, for the mock provider.
+
+    Temperatures follow a daily cosine curve between each day's low and high
+    (warmest at 15:00), starting at the current hour.
+    """
+    start = datetime.now().replace(minute=0, second=0, microsecond=0)
+    temps, conditions = [], []
+    for hour in range(len(daily) * 24 - start.hour):
+        moment = start + timedelta(hours=hour)
+        day = daily[(moment.date() - start.date()).days]
+        mid, amplitude = (day["high"] + day["low"]) / 2, (day["high"] - day["low"]) / 2
+        temps.append(round(mid + amplitude * math.cos(2 * math.pi * (moment.hour - 15) / 24), 1))
+        conditions.append(day["condition"])
+    return {"start": start.isoformat(), "temp": temps, "condition": conditions}
+
+
+def format_temp(value: float) -> str:
+    """Render a stored temperature without float32 noise (25.0 -> 25, 18.5 -> 18.5)."""
+    return f"{round(value, 1):g}"
+
+
+def day_label(series: ForecastSeries, index: int) -> str:
+    """
+    Name a daily forecast step: Today, Tomorrow, then the weekday and date.
+
+    Labels come from the step's date, not its position, so a forecast served
+    from an old snapshot or the offline cache isn't labelled as if fetched today.
+    """
+    day = series.time_at(index)
+    days_ahead = (day.date() - datetime.now().date()).days
+    if days_ahead == 0:
+        return "Today"
+    if days_ahead == 1:
+        return "Tomorrow"
+    return day.strftime('%A %d %b')
+
+
+class WeatherReport(NamedTuple):
+    """
+    Current conditions for a city, with the time they were fetched.
+
+    The report's forecasts are kept in the ForecastStore instead of `data`.
+    `status` is "fresh", "stale" (served past its TTL while a refresh runs) or
+    "offline" (the provider failed, so the last good report is served instead).
+    """
+    data: Dict[str, Any]
+    fetched_at: datetime
+    status: str = "fresh"
+
+    @property
+    def age_seconds(self) -> float:
+        return max(0.0, (datetime.now() - self.fetched_at).total_seconds())
+
+
+class WeatherCache:
+    """
+    Per-city TTL cache in front of a WeatherProvider, with single-flight fetches.
+
+    When many callers ask for the same city while it isn't cached, only the first
+    one calls the provider; the others await that same fetch and share its result.
+    Each fetch also refreshes the city's forecasts in `forecasts`.
+
+    Reports are served stale-while-revalidate: for `stale_ttl` seconds past
+    the TTL a cached report is returned immediately while a background fetch
+    refreshes it. If the provider fails, the last good report is served no
+    matter its age, and that city isn't fetched again for `retry_after`
+    seconds.
+
+    After `enable_snapshot()`, the cache is saved to a file (shortly after
+    fetches and at exit) and reloaded from it, so a restarted server answers
+    from the snapshot right away, including during upstream outages.
+    """
+
+    def __init__(self, provider: WeatherProvider, ttl: float, forecasts: ForecastStore,
+                 stale_ttl: float = 0, retry_after: float = 30, snapshot_interval: float = 30):
+        self.provider = provider
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.retry_after = retry_after
+        self.forecasts = forecasts
+        self.snapshot_path = ""
+        self.snapshot_interval = snapshot_interval
+        self._entries: Dict[str, WeatherReport] = {}
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._failed_at: Dict[str, float] = {}
+        self._save_task: Optional[asyncio.Task] = None
+
+    def enable_snapshot(self, snapshot_path: str) -> int:
+        """
+        Load the cache from snapshot_path and keep saving it there; returns how
+        many reports were loaded.
+
+        Only the server process should call this, not modules that merely
+        import this one, or they would overwrite the server's snapshot.
+        """
+        if not snapshot_path:
+            return 0
+        self.snapshot_path = snapshot_path
+        atexit.register(self.save_snapshot)
+        return self.load_snapshot()
+
+    def _recently_failed(self, city_key: str) -> bool:
+        failed_at = self._failed_at.get(city_key)
+        return failed_at is not None and time.monotonic() - failed_at < self.retry_after
+
+    async def get(self, city_key: str) -> WeatherReport:
+        report = self._entries.get(city_key)
+        if report is not None:
+            age = report.age_seconds
+            if age < self.ttl:
+                return report
+            if age < self.ttl + self.stale_ttl:
+                # Serve the stale report now and refresh it in the background,
+                # unless the provider failed moments ago
+                if not self._recently_failed(city_key):
+                    self._start_fetch(city_key)
+                return report._replace(status="stale")
+            if self._recently_failed(city_key):
+                # Don't make every caller wait on a provider that just failed
+                return report._replace(status="offline")
+
+        try:
+            # shield() so one caller giving up doesn't cancel the fetch for the others
+            return await asyncio.shield(self._start_fetch(city_key))
+        except CityNotFoundError:
+            raise
+        except Exception:
+            if report is None:
+                raise
+            return report._replace(status="offline")
+
+    def _start_fetch(self, city_key: str) -> asyncio.Task:
+        task = self._inflight.get(city_key)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch(city_key))
+            # Background refreshes may have no awaiting caller; don't warn about their errors
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+            self._inflight[city_key] = task
+        return task
+
+    async def _fetch(self, city_key: str) -> WeatherReport:
+        try:
+            try:
+                data = await self.provider.fetch(city_key)
+            except CityNotFoundError:
+                raise
+            except Exception:
+                self._failed_at[city_key] = time.monotonic()
+                raise
+            self._failed_at.pop(city_key, None)
+            report = self._store(city_key, data, datetime.now())
+            self._schedule_save()
+            return report
+        finally:
+            del self._inflight[city_key]
+
+    def _store(self, city_key: str, data: Dict[str, Any], fetched_at: datetime) -> WeatherReport:
+        self.forecasts.put(city_key, data, fetched_at)
+        current = {key: value for key, value in data.items() if key not in ("forecast", "hourly")}
+        report = WeatherReport(current, fetched_at)
+        self._entries[city_key] = report
+        return report
+
+    def expires_in(self, city_key: str) -> Optional[float]:
+        """Seconds until a city's cached report goes stale (None if not cached)."""
+        report = self._entries.get(city_key)
+        return None if report is None else self.ttl - report.age_seconds
+
+    async def refresh(self, city_key: str) -> Optional[bool]:
+        """
+        Fetch a city now, replacing its cached report.
+
+        Returns True on success, False if the provider failed (or failed
+        recently) and None if the provider doesn't know the city.
+        """
+        if self._recently_failed(city_key):
+            return False
+        try:
+            await asyncio.shield(self._start_fetch(city_key))
+            return True
+        except CityNotFoundError:
+            return None
+        except Exception:
+            return False
+
+    async def available_cities(self) -> List[str]:
+        return await self.provider.cities()
+
+    def _schedule_save(self) -> None:
+        # Batch snapshot writes: at most one per snapshot_interval
+        if self.snapshot_path and (self._save_task is None or self._save_task.done()):
+            self._save_task = asyncio.ensure_future(self._save_later())
+
+    async def _save_later(self) -> None:
+        await asyncio.sleep(self.snapshot_interval)
+        # Serialize on the event loop (entries may change), write in a thread
+        payload = self._snapshot_json()
+        await asyncio.to_thread(self._write_snapshot, payload)
+
+    def _snapshot_json(self) -> str:
+        cities = {
+            city_key: {
+                "fetched_at": report.fetched_at.isoformat(),
+                "data": {**report.data, **self.forecasts.export(city_key)},
+            }
+            for city_key, report in self._entries.items()
+        }
+        return json.dumps({"version": SNAPSHOT_VERSION, "cities": cities}, ensure_ascii=False)
+
+    def _write_snapshot(self, payload: str) -> None:
+        os.makedirs(os.path.dirname(self.snapshot_path) or ".", exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(self.snapshot_path) or ".", suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(payload)
+            os.replace(tmp_path, self.snapshot_path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def save_snapshot(self) -> None:
+        """Write the cache to snapshot_path now (also called at exit)."""
+        if self.snapshot_path and self._entries:
+            try:
+                self._write_snapshot(self._snapshot_json())
+            except OSError:
+                pass
+
+    def load_snapshot(self) -> int:
+        """Load cached reports from snapshot_path; returns how many were loaded."""
+        try:
+            with open(self.snapshot_path, encoding='utf-8') as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError):
+            return 0
+        if snapshot.get("version") != SNAPSHOT_VERSION:
+            return 0
+
+        loaded = 0
+        for city_key, entry in snapshot.get("cities", {}).items():
+            try:
+                self._store(city_key, entry["data"], datetime.fromisoformat(entry["fetched_at"]))
+                loaded += 1
+            except (KeyError, TypeError, ValueError):
+                continue
+        return loaded
+
+
+class RequestCounter:
+    """
+    Per-city request counts that decay exponentially over time.
+
+    Halving every `half_life` seconds keeps the ranking focused on what agents
+    are asking about now rather than on all-time totals.
+    """
+
+    def __init__(self, half_life: float):
+        self.half_life = half_life
+        self._counts: Dict[str, float] = {}
+
+    def record(self, city_key: str) -> None:
+        self._counts[city_key] = self._counts.get(city_key, 0.0) + 1
+
+    def forget(self, city_key: str) -> None:
+        self._counts.pop(city_key, None)
+
+    def decay(self, elapsed: float) -> None:
+        factor = 0.5 ** (elapsed / self.half_life)
+        self._counts = {
+            city_key: count * factor
+            for city_key, count in self._counts.items()
+            if count * factor >= 0.01
+        }
+
+    def top(self, n: int) -> List[str]:
+        return heapq.nlargest(n, self._counts, key=self._counts.__getitem__)
+
+
+class PrefetchScheduler:
+    """
+    Background task that keeps the most requested cities warm in the cache.
+
+    Every `interval` seconds it takes the `top_n` cities from the request
+    counter and refreshes those whose cached report would expire within the
+    next two runs, most popular first, spending at most `budget_per_minute` upstream
+    calls per minute. Requests for popular cities are then cache hits.
+    """
+
+    def __init__(self, cache: WeatherCache, counter: RequestCounter, top_n: int,
+                 interval: float, budget_per_minute: float):
+        self.cache = cache
+        self.counter = counter
+        self.top_n = top_n
+        self.interval = interval
+        self.budget_per_minute = budget_per_minute
+        self.prefetched = 0
+        self._tokens = 0.0
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def ensure_started(self) -> None:
+        """Start the background task on the running event loop if it isn't running."""
+        if self.top_n <= 0 or self.budget_per_minute <= 0:
+            return
+        loop = asyncio.get_running_loop()
+        if self._task is None or self._task.done() or self._loop is not loop:
+            self._task = loop.create_task(self._run())
+            self._loop = loop
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        next_run = loop.time()
+        while True:
+            # Fixed cadence, so slow runs don't push later ones past an expiry
+            next_run += self.interval
+            await asyncio.sleep(max(0.0, next_run - loop.time()))
+            try:
+                await self.run_once()
+            except Exception:
+                # A failed cycle must not stop prefetching; the next one retries
+                pass
+            self.counter.decay(self.interval)
+
+    async def run_once(self) -> int:
+        """Refresh the hot cities that are about to expire; returns how many were fetched."""
+        # Token bucket: each run earns its share of the per-minute budget, and
+        # unspent calls carry over for up to a minute
+        earned = self.budget_per_minute * self.interval / 60
+        self._tokens = min(max(self.budget_per_minute, earned), self._tokens + earned)
+        due = []
+        for city_key in self.counter.top(self.top_n):
+            if len(due) >= int(self._tokens):
+                break
+            # Refresh a run early, so the fetch completes before the entry expires
+            expires_in = self.cache.expires_in(city_key)
+            if expires_in is None or expires_in < 2 * self.interval:
+                due.append(city_key)
+
+        self._tokens -= len(due)
+        results = await asyncio.gather(*(self.cache.refresh(city_key) for city_key in due))
+        for city_key, found in zip(due, results):
+            if found is None:
+                # The provider doesn't know this city; stop spending budget on it
+                self.counter.forget(city_key)
+        self.prefetched += sum(1 for found in results if found)
+        return len(due)
+
+
+class CityRegistry:
+    """
+    The live list of cities the provider serves, and text rendered from it.
+
+    `version` goes up whenever the list changes. Views of the list (the
+    weather://cities resource, the assistant prompt) are rendered once per
+    version and served from cache until the next change, and listeners are
+    called so clients can be told to re-read. The list is
+    re-fetched from the provider every `refresh_interval` seconds.
+    """
+
+    def __init__(self, cache: WeatherCache, refresh_interval: float):
+        self.cache = cache
+        self.refresh_interval = refresh_interval
+        self.cities: List[str] = []
+        self.version = 0
+        self.changed_at: Optional[datetime] = None
+        self._rendered: Dict[str, Tuple[int, str]] = {}
+        self._listeners: List[Callable[[], Awaitable[None]]] = []
+        self._refreshing: Optional[asyncio.Task] = None
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def add_listener(self, listener: Callable[[], Awaitable[None]]) -> None:
+        """Register an async callback run after the city list changes."""
+        self._listeners.append(listener)
+
+    async def ensure_loaded(self) -> None:
+        """Load the list on first use and start the periodic refresh."""
+        loop = asyncio.get_running_loop()
+        if self._task is None or self._task.done() or self._loop is not loop:
+            self._task = loop.create_task(self._run())
+            self._loop = loop
+        if self.version == 0:
+            await self.refresh()
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            try:
+                await self.refresh()
+            except Exception:
+                pass
+
+    async def refresh(self) -> bool:
+        """Re-read the city list from the provider; returns True if it changed."""
+        # Concurrent callers share one provider request
+        if self._refreshing is None or self._refreshing.done():
+            self._refreshing = asyncio.ensure_future(self._refresh())
+        return await asyncio.shield(self._refreshing)
+
+    async def _refresh(self) -> bool:
+        cities = await self.cache.available_cities()
+        if self.version and (cities == self.cities or not cities):
+            # Unchanged, or the provider is unavailable: keep the current list
+            return False
+        self.cities = cities
+        self.version += 1
+        self.changed_at = datetime.now()
+        for listener in self._listeners:
+            try:
+                await listener()
+            except Exception:
+                pass
+        return True
+
+    def render(self, name: str, renderer: Callable[["CityRegistry"], str]) -> str:
+        """Return the cached rendering `name`, re-rendering it if the list changed."""
+        cached = self._rendered.get(name)
+        if cached is None or cached[0] != self.version:
+            cached = (self.version, renderer(self))
+            self._rendered[name] = cached
+        return cached[1]
+
+
+class City(NamedTuple):
+    """A gazetteer entry. `key` is the normalized name used with the provider."""
+    key: str
+    name: str
+    lat: float
+    lon: float
+
+
+def normalize_city(name: str) -> str:
+    """Normalize a city name for exact lookups: lowercase, single spaces."""
+    return ' '.join(name.lower().split())
+
+
+def trigrams(text: str) -> set:
+    """Return the set of character trigrams of a normalized, space-padded name."""
+    padded = f"  {normalize_city(text)} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def to_unit_vector(lat: float, lon: float) -> Tuple[float, float, float]:
+    """Convert latitude/longitude in degrees to a point on the unit sphere."""
+    phi, lam = math.radians(lat), math.radians(lon)
+    return (math.cos(phi) * math.cos(lam), math.cos(phi) * math.sin(lam), math.sin(phi))
+
+
+def chord_to_km(chord_sq: float) -> float:
+    """Convert a squared chord length on the unit sphere to a great-circle distance."""
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(chord_sq) / 2))
+
+
+class CityGazetteer:
+    """
+    In-memory index of cities by name, alias and location.
+
+    - Exact names and aliases are a dict lookup.
+    - Misspelled names go through a trigram index with prefix filtering: a city
+      can only reach the minimum score if it shares one of the query's rarest
+      trigrams, so only those short posting lists are scanned.
+    - Nearest-city queries use a KD-tree over points on the unit sphere (so
+      there is no seam at the antimeridian or distortion near the poles),
+      which answers k-nearest lookups in O(log n) for tens of thousands of cities.
+    """
+
+    def __init__(self, entries: List[Dict[str, Any]]):
+        self._by_name: Dict[str, City] = {}
+        self._postings: Dict[str, set] = {}
+        self._grams: Dict[str, set] = {}
+        self._cities: Dict[str, City] = {}
+        for entry in entries:
+            self._add(entry)
+        self._build_tree()
+
+    def __len__(self) -> int:
+        return len(self._cities)
+
+    def _add(self, entry: Dict[str, Any]) -> None:
+        key = normalize_city(entry["name"])
+        if not key or key in self._cities:
+            return
+        city = City(key, entry["name"], float(entry["lat"]), float(entry["lon"]))
+        self._cities[key] = city
+        for name in [entry["name"], *entry.get("aliases", ())]:
+            name_key = normalize_city(name)
+            if not name_key or name_key in self._by_name:
+                continue
+            self._by_name[name_key] = city
+            grams = trigrams(name_key)
+            self._grams[name_key] = grams
+            for gram in grams:
+                self._postings.setdefault(gram, set()).add(name_key)
+
+    def _build_tree(self) -> None:
+        # Implicit KD-tree: each slice of _points holds its median (on the
+        # slice's split axis) in the middle, smaller points left, larger right
+        self._points = [(*to_unit_vector(city.lat, city.lon), city) for city in self._cities.values()]
+
+        def build(lo: int, hi: int, axis: int) -> None:
+            if hi - lo <= 1:
+                return
+            self._points[lo:hi] = sorted(self._points[lo:hi], key=lambda point: point[axis])
+            mid = (lo + hi) // 2
+            build(lo, mid, (axis + 1) % 3)
+            build(mid + 1, hi, (axis + 1) % 3)
+
+        build(0, len(self._points), 0)
+
+    def get(self, name: str) -> Optional[City]:
+        """Exact lookup by name or alias."""
+        return self._by_name.get(normalize_city(name))
+
+    def search(self, query: str, limit: int = 5,
+               min_score: float = GAZETTEER_SUGGEST_SCORE) -> List[Tuple[City, float]]:
+        """
+        Find the cities whose names or aliases best match `query`.
+
+        Returns:
+            List of (city, Dice score) pairs, best match first, one per city
+        """
+        query_grams = trigrams(query)
+        if not query_grams:
+            return []
+
+        # Dice >= min_score needs at least `required` shared trigrams, so a
+        # match must contain one of the (len - required + 1) rarest ones
+        required = max(1, math.ceil(min_score * len(query_grams) / (2 - min_score)))
+        by_rarity = sorted(query_grams, key=lambda gram: len(self._postings.get(gram, ())))
+        candidates: set = set()
+        for gram in by_rarity[:len(query_grams) - required + 1]:
+            candidates.update(self._postings.get(gram, ()))
+
+        best: Dict[str, Tuple[float, City]] = {}
+        for name_key in candidates:
+            grams = self._grams[name_key]
+            score = 2 * len(query_grams & grams) / (len(query_grams) + len(grams))
+            city = self._by_name[name_key]
+            if score >= min_score and score > best.get(city.key, (0.0,))[0]:
+                best[city.key] = (score, city)
+
+        ranked = heapq.nlargest(limit, best.values(), key=lambda item: item[0])
+        return [(city, round(score, 3)) for score, city in ranked]
+
+    def nearest(self, lat: float, lon: float, k: int = 1) -> List[Tuple[City, float]]:
+        """
+        Find the k cities closest to a point.
+
+        Returns:
+            List of (city, distance in km) pairs, closest first
+        """
+        target = to_unit_vector(lat, lon)
+        heap: List[Tuple[float, int, City]] = []  # max-heap of the k best, as negated distances
+
+        def visit(lo: int, hi: int, axis: int) -> None:
+            if lo >= hi:
+                return
+            mid = (lo + hi) // 2
+            point = self._points[mid]
+            dist = sum((point[i] - target[i]) ** 2 for i in range(3))
+            if len(heap) < k:
+                heapq.heappush(heap, (-dist, mid, point[3]))
+            elif dist < -heap[0][0]:
+                heapq.heapreplace(heap, (-dist, mid, point[3]))
+
+            diff = target[axis] - point[axis]
+            near, far = ((lo, mid), (mid + 1, hi)) if diff < 0 else ((mid + 1, hi), (lo, mid))
+            visit(near[0], near[1], (axis + 1) % 3)
+            # Only cross the split plane if it's closer than the current k-th best
+            if len(heap) < k or diff * diff < -heap[0][0]:
+                visit(far[0], far[1], (axis + 1) % 3)
+
+        visit(0, len(self._points), 0)
+        return [(city, round(chord_to_km(-neg), 1)) for neg, _, city in sorted(heap, reverse=True)]
+
+
+def load_gazetteer_csv(path: str) -> List[Dict[str, Any]]:
+    """Read gazetteer entries from a CSV with name, lat, lon[, aliases] columns."""
+    entries = []
+    with open(path, newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            aliases = row.get("aliases") or ""
+            entries.append({
+                "name": row["name"],
+                "lat": float(row["lat"]),
+                "lon": float(row["lon"]),
+                "aliases": [alias for alias in aliases.split("|") if alias.strip()],
+            })
+    return entries
+
+
+def create_gazetteer() -> CityGazetteer:
+    """Build the gazetteer from the built-in cities plus WEATHER_GAZETTEER_PATH."""
+    entries = list(MOCK_CITY_GAZETTEER)
+    if WEATHER_GAZETTEER_PATH:
+        entries.extend(load_gazetteer_csv(WEATHER_GAZETTEER_PATH))
+    return CityGazetteer(entries)
+
+
+def create_provider() -> WeatherProvider:
+    """Build the weather provider selected by WEATHER_PROVIDER."""
+    if WEATHER_PROVIDER == "http":
+        return HttpWeatherProvider(WEATHER_API_URL, WEATHER_API_KEY, WEATHER_HTTP_TIMEOUT,
+                                   WEATHER_MAX_CONCURRENCY)
+    return MockWeatherProvider(MOCK_WEATHER_DATA)
+
+
+forecast_store = ForecastStore()
+weather_cache = WeatherCache(
+    create_provider(),
+    WEATHER_CACHE_TTL,
+    forecast_store,
+    stale_ttl=WEATHER_STALE_TTL,
+    retry_after=WEATHER_RETRY_AFTER,
+    snapshot_interval=WEATHER_SNAPSHOT_INTERVAL,
+)
+city_requests = RequestCounter(WEATHER_PREFETCH_HALF_LIFE)
+prefetcher = PrefetchScheduler(
+    weather_cache,
+    city_requests,
+    top_n=WEATHER_PREFETCH_TOP_N,
+    interval=WEATHER_PREFETCH_INTERVAL,
+    budget_per_minute=WEATHER_PREFETCH_BUDGET,
+)
+city_registry = CityRegistry(weather_cache, WEATHER_CITIES_REFRESH)
+gazetteer = create_gazetteer()
+
+
+def resolve_city(city: str) -> Tuple[str, str]:
+    """
+    Map a user-supplied city name to (provider key, display name).
+
+    Names and aliases in the gazetteer resolve to the canonical city; anything
+    else is passed to the provider as typed. Close misspellings are not
+    corrected here, since a real city can look like a misspelling of another
+    ("Londonderry" vs "London"); they are only suggested once the provider
+    doesn't know the name.
+    """
+    match = gazetteer.get(city)
+    if match is not None:
+        return match.key, match.name
+    return normalize_city(city), city.strip().title()
+
+
+async def get_weather(city_key: str) -> WeatherReport:
+    """
+    Look a city up through the cache, counting the request for prefetching.
+
+    Every tool goes through here, so the prefetcher sees what agents ask for.
+    """
+    prefetcher.ensure_started()
+    city_requests.record(city_key)
+    try:
+        return await weather_cache.get(city_key)
+    except CityNotFoundError:
+        city_requests.forget(city_key)
+        raise
+
+
+async def city_not_found_message(cities: List[str]) -> str:
+    """Build the error for unknown cities, with 'Did you mean' suggestions."""
+    message = f"Weather data not available for: {', '.join(cities)}."
+    suggestions = []
+    for city in cities:
+        for match, _ in gazetteer.search(city, limit=3):
+            if match.name not in suggestions:
+                suggestions.append(match.name)
+    if suggestions:
+        return message + f" Did you mean: {', '.join(suggestions)}?"
+
+    # No close names: list the supported cities, unless there are too many to be useful
+    await city_registry.ensure_loaded()
+    available = city_registry.cities
+    if available and len(available) <= CITY_HINT_MAX:
+        message += f" Available cities: {', '.join(available).title()}"
+    elif available:
+        message += f" {len(available)} cities are available; see the weather://cities resource."
+    return message
+
+
+def unique_cities(cities: List[str]) -> Dict[str, str]:
+    """Resolve city names to {provider key: display name}, dropping duplicates and blanks."""
+    unique: Dict[str, str] = {}
+    for city in cities:
+        if not city.strip():
+            continue
+        city_key, display_name = resolve_city(city)
+        if city_key not in unique:
+            unique[city_key] = display_name
+    return unique
+
+
+def format_timestamp(moment: datetime) -> str:
+    """Render a timestamp the way every weather response shows it."""
+    return moment.strftime(TIMESTAMP_FORMAT)
+
+
+def to_json(payload: Dict[str, Any]) -> str:
+    """Serialize a tool result compactly for format="json"."""
+    return json.dumps(payload, ensure_ascii=False, separators=(',', ':'))
+
+
+def format_age(seconds: float) -> str:
+    """Render an age compactly: 45s, 12 min, 3 h, 2 days."""
+    if seconds < 60:
+        return f"{int(seconds)}s"
+    if seconds < 3600:
+        return f"{int(seconds // 60)} min"
+    if seconds < 86400:
+        return f"{int(seconds // 3600)} h"
+    return f"{int(seconds // 86400)} days"
+
+
+def staleness_note(report: WeatherReport) -> str:
+    """A warning line for markdown responses built from stale or offline data."""
+    if report.status == "fresh":
+        return ""
+    return STALENESS_NOTES[report.status].format(age=format_age(report.age_seconds))
+
+
+def freshness_fields(report: WeatherReport) -> Dict[str, Any]:
+    """When and how fresh a report is, as returned in JSON mode."""
+    return {
+        "fetched_at": report.fetched_at.isoformat(timespec='seconds'),
+        "age_seconds": int(report.age_seconds),
+        "status": report.status,
+    }
+
+
+def condition_fields(report: WeatherReport, missing: Any = "n/a") -> Dict[str, Any]:
+    """
+    The current-conditions fields the templates use, taken by name from the
+    provider's report. Other keys in an upstream payload are ignored, and
+    fields it lacks are filled with `missing`.
+    """
+    return {field: report.data.get(field, missing) for field in CONDITION_FIELDS}
+
+
+def current_weather_fields(report: WeatherReport) -> Dict[str, Any]:
+    """The current-conditions fields of a report, as returned in JSON mode."""
+    return {**condition_fields(report, missing=None), **freshness_fields(report)}
+
+
 @mcp.tool()
-def get_current_weather(city: str) -> str:
+async def get_current_weather(city: str, format: str = "markdown") -> str:
     """
     Get the current weather conditions for a specified city.
     
@@ -71,6 +1292,7 @@ def get_current_weather(city: str) -> str:
     
     Args:
         city: The name of the city to get weather for
+        format: "markdown" for a readable summary or "json" for structured output
         
     Returns:
         A formatted json with current weather information
@@ -79,27 +1301,28 @@ def get_current_weather(city: str) -> str:
         get_current_weather("New York") returns current conditions for NYC
     """
     try:
-        # Normalize city name for lookup
-        city_key = city.lower().strip()
+        if format not in ('markdown', 'json'):
+            return f"❌ Unknown format '{format}'. Use 'markdown' or 'json'."
+        
+        # Resolve names and aliases to the canonical city
+        city_key, display_name = resolve_city(city)
         
-        if city_key not in MOCK_WEATHER_DATA:
+        try:
+            report = await get_weather(city_key)
+        except CityNotFoundError:
             # Return a helpful error message
-            available_cities = ", ".join(MOCK_WEATHER_DATA.keys()).title()
-            return f" Weather data not available for '{city}'. Available cities: {available_cities}"
+            return f" {await city_not_found_message([city])}"
         
-        weather = MOCK_WEATHER_DATA[city_key]
+        if format == 'json':
+            return to_json({"city": display_name, **current_weather_fields(report)})
         
         # Format the response in a user-friendly way
-        response = f"""🌤️ **Current Weather in {city.title()}**
-
-🌡️ **Temperature**: {weather['temperature']}°C
-☁️ **Condition**: {weather['condition']}
-💧 **Humidity**: {weather['humidity']}%
-💨 **Wind Speed**: {weather['wind_speed']} km/h
-
-*Last updated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}*"""
-        
-        return response
+        return CURRENT_WEATHER_TEMPLATE.format(
+            city=display_name,
+            updated=format_timestamp(report.fetched_at),
+            staleness=staleness_note(report),
+            **condition_fields(report)
+        )
         
     except Exception as e:
         raise McpError(
@@ -110,182 +1333,579 @@ def get_current_weather(city: str) -> str:
         ) from e
 
 @mcp.tool()
-def get_weather_forecast(city: str, days: int = 3) -> str:
+async def get_weather_forecast(city: str, days: int = 3, format: str = "markdown") -> str:
     """
     Get a multi-day weather forecast for a specified city.
     
     Args:
         city: The name of the city to get forecast for
-        days: Number of days to forecast (1-7, default: 3)
+        days: Number of days to forecast (1-16, default: 3); if the provider has
+            fewer days, all available days are returned
+        format: "markdown" for a readable forecast or "json" for structured output
         
     Returns:
         A formatted string with weather forecast information
     """
     try:
         # Validate input parameters
-        if days < 1 or days > 7:
-            return "❌ Forecast days must be between 1 and 7"
+        if days < 1 or days > FORECAST_MAX_DAYS:
+            return f"❌ Forecast days must be between 1 and {FORECAST_MAX_DAYS}"
+        if format not in ('markdown', 'json'):
+            return f"❌ Unknown format '{format}'. Use 'markdown' or 'json'."
             
-        city_key = city.lower().strip()
+        city_key, display_name = resolve_city(city)
         
-        if city_key not in MOCK_WEATHER_DATA:
-            available_cities = ", ".join(MOCK_WEATHER_DATA.keys()).title()
-            return f"❌ Weather data not available for '{city}'. Available cities: {available_cities}"
+        try:
+            report = await get_weather(city_key)
+        except CityNotFoundError:
+            return f"❌ {await city_not_found_message([city])}"
         
-        weather_data = MOCK_WEATHER_DATA[city_key]
-        forecast = weather_data["forecast"][:days]
+        series = forecast_store.get(city_key, "daily")
+        available = len(series) if series else 0
+        forecast = forecast_store.rows(series, 0, days) if series else []
+        
+        if format == 'json':
+            return to_json({
+                "city": display_name,
+                "days_available": available,
+                "forecast": [
+                    {
+                        "day": day_label(series, i),
+                        "date": day["time"].date().isoformat(),
+                        "high": day["high"],
+                        "low": day["low"],
+                        "condition": day["condition"],
+                    }
+                    for i, day in enumerate(forecast)
+                ],
+                **freshness_fields(report),
+            })
         
         # Format the forecast response
-        response = f"📅 **{days}-Day Weather Forecast for {city.title()}**\n\n"
+        return FORECAST_TEMPLATE.format(
+            days=len(forecast),
+            city=display_name,
+            forecast_days="".join(
+                FORECAST_DAY_TEMPLATE.format(
+                    day=day_label(series, i),
+                    high=format_temp(day["high"]),
+                    low=format_temp(day["low"]),
+                    condition=day["condition"],
+                )
+                for i, day in enumerate(forecast)
+            ),
+            note=FORECAST_SHORT_NOTE.format(available=available, city=display_name) if days > available else "",
+            updated=format_timestamp(report.fetched_at),
+            staleness=staleness_note(report),
+        )
+        
+    except Exception as e:
+        raise McpError(
+            ErrorData(
+                code=INTERNAL_ERROR,
+                message=f"Failed to retrieve forecast for {city}: {str(e)}"
+            )
+        ) from e
+
+@mcp.tool()
+async def get_forecast_range(
+    city: str,
+    horizon: str = "daily",
+    start: int = 0,
+    count: int = 24,
+    format: str = "markdown"
+) -> str:
+    """
+    Get a window of a city's daily or hourly forecast.
+    
+    Args:
+        city: The name of the city
+        horizon: "daily" (one step per day, starting today) or "hourly"
+            (one step per hour, starting at the hour of the last update)
+        start: Index of the first step to return (0 = first step)
+        count: Number of steps to return (max 384)
+        format: "markdown" for a table or "json" for structured output
+        
+    Returns:
+        A table with one row per forecast step
+        
+    Example:
+        get_forecast_range("Tokyo", horizon="hourly", start=0, count=12)
+    """
+    try:
+        if horizon not in FORECAST_FIELDS:
+            return f"❌ Unknown horizon '{horizon}'. Use 'daily' or 'hourly'."
+        if start < 0 or count < 1 or count > FORECAST_MAX_WINDOW:
+            return f"❌ start must be >= 0 and count between 1 and {FORECAST_MAX_WINDOW}"
+        if format not in ('markdown', 'json'):
+            return f"❌ Unknown format '{format}'. Use 'markdown' or 'json'."
         
-        for day_forecast in forecast:
-            response += f"**{day_forecast['day']}**\n"
-            response += f"   🌡️ High: {day_forecast['high']}°C | Low: {day_forecast['low']}°C\n"
-            response += f"   ☁️ Condition: {day_forecast['condition']}\n\n"
+        city_key, display_name = resolve_city(city)
         
-        response += f"*Forecast generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}*"
+        try:
+            report = await get_weather(city_key)
+        except CityNotFoundError:
+            return f"❌ {await city_not_found_message([city])}"
         
-        return response
+        series = forecast_store.get(city_key, horizon)
+        if series is None or start >= len(series):
+            available = len(series) if series else 0
+            return f"❌ No {horizon} forecast steps from {start} for {display_name} ({available} available)"
+        
+        rows = forecast_store.rows(series, start, count)
+        time_format = '%Y-%m-%d' if horizon == "daily" else '%Y-%m-%d %H:%M'
+        
+        if format == 'json':
+            return to_json({
+                "city": display_name,
+                "horizon": horizon,
+                "start": start,
+                "total": len(series),
+                "steps": [{**row, "time": row["time"].strftime(time_format)} for row in rows],
+                **freshness_fields(report),
+            })
+        
+        row_template = FORECAST_RANGE_ROWS[horizon]
+        return FORECAST_RANGE_TEMPLATE.format(
+            horizon=horizon.title(),
+            city=display_name,
+            first=start,
+            last=start + len(rows) - 1,
+            total=len(series),
+            header=FORECAST_RANGE_HEADERS[horizon],
+            rows="\n".join(
+                row_template.format(
+                    date=row["time"].strftime(time_format),
+                    condition=row["condition"],
+                    **{field: format_temp(row[field]) for field in FORECAST_FIELDS[horizon]},
+                )
+                for row in rows
+            ),
+            updated=format_timestamp(report.fetched_at),
+            staleness=staleness_note(report),
+        )
         
     except Exception as e:
         raise McpError(
             ErrorData(
                 code=INTERNAL_ERROR,
-                message=f"Failed to retrieve forecast for {city}: {str(e)}"
+                message=f"Failed to retrieve forecast range for {city}: {str(e)}"
             )
         ) from e
 
 @mcp.tool()
-def compare_weather(city1: str, city2: str) -> str:
+async def get_forecast_stats(
+    cities: List[str],
+    field: str = "",
+    horizon: str = "daily",
+    start: int = 0,
+    count: int = 7,
+    format: str = "markdown"
+) -> str:
+    """
+    Get min, max and mean of a forecast field over a window, for many cities.
+    
+    Args:
+        cities: City names to summarise (max 100)
+        field: Forecast field to aggregate - "high" or "low" for daily,
+            "temp" for hourly (default: the first of these for the horizon)
+        horizon: "daily" or "hourly"
+        start: Index of the first step in the window (0 = first step)
+        count: Number of steps in the window (max 384)
+        format: "markdown" for a table or "json" for structured output
+        
+    Returns:
+        A table with the min, max and mean per city
+        
+    Example:
+        get_forecast_stats(["London", "Tokyo"], field="high", count=3)
+    """
+    try:
+        if horizon not in FORECAST_FIELDS:
+            return f"❌ Unknown horizon '{horizon}'. Use 'daily' or 'hourly'."
+        field = field or FORECAST_FIELDS[horizon][0]
+        if field not in FORECAST_FIELDS[horizon]:
+            return f"❌ Unknown {horizon} field '{field}'. Use one of: {', '.join(FORECAST_FIELDS[horizon])}"
+        if start < 0 or count < 1 or count > FORECAST_MAX_WINDOW:
+            return f"❌ start must be >= 0 and count between 1 and {FORECAST_MAX_WINDOW}"
+        if format not in ('markdown', 'json'):
+            return f"❌ Unknown format '{format}'. Use 'markdown' or 'json'."
+        
+        unique = unique_cities(cities)
+        if not unique:
+            return "❌ Please provide at least one city"
+        if len(unique) > WEATHER_BATCH_MAX_CITIES:
+            return f"❌ At most {WEATHER_BATCH_MAX_CITIES} cities per call (got {len(unique)})"
+        
+        results = await asyncio.gather(
+            *(get_weather(city_key) for city_key in unique), return_exceptions=True
+        )
+        
+        entries = []
+        for (city_key, city), result in zip(unique.items(), results):
+            if isinstance(result, CityNotFoundError):
+                entries.append({"city": city, "error": "not available"})
+                continue
+            if isinstance(result, Exception):
+                entries.append({"city": city, "error": f"lookup failed: {result}"})
+                continue
+            series = forecast_store.get(city_key, horizon)
+            stats = series.aggregate(field, start, count) if series else None
+            if stats is None:
+                entries.append({"city": city, "error": f"no {horizon} forecast in window"})
+            else:
+                entries.append({"city": city, **stats, "steps": min(count, len(series) - start)})
+        
+        if format == 'json':
+            return to_json({
+                "field": field,
+                "horizon": horizon,
+                "start": start,
+                "count": count,
+                "cities": entries,
+            })
+        
+        # The window ends early for series shorter than start + count
+        steps = [entry["steps"] for entry in entries if "steps" in entry]
+        return FORECAST_STATS_TEMPLATE.format(
+            horizon=horizon.title(),
+            field=field,
+            first=start,
+            last=start + (max(steps) if steps else count) - 1,
+            rows="\n".join(
+                BATCH_ERROR_ROW_TEMPLATE.format(**entry) if "error" in entry
+                else FORECAST_STATS_ROW_TEMPLATE.format(**entry)
+                for entry in entries
+            ),
+        )
+        
+    except Exception as e:
+        raise McpError(
+            ErrorData(
+                code=INTERNAL_ERROR,
+                message=f"Failed to compute forecast statistics: {str(e)}"
+            )
+        ) from e
+
+@mcp.tool()
+async def compare_weather(city1: str, city2: str, format: str = "markdown") -> str:
     """
     Compare current weather conditions between two cities.
     
     Args:
         city1: Name of the first city
         city2: Name of the second city
+        format: "markdown" for a readable comparison or "json" for structured output
         
     Returns:
         A formatted comparison of weather between the two cities
     """
     try:
-        city1_key = city1.lower().strip()
-        city2_key = city2.lower().strip()
+        if format not in ('markdown', 'json'):
+            return f"❌ Unknown format '{format}'. Use 'markdown' or 'json'."
         
-        # Check if both cities are available
-        missing_cities = []
-        if city1_key not in MOCK_WEATHER_DATA:
-            missing_cities.append(city1)
-        if city2_key not in MOCK_WEATHER_DATA:
-            missing_cities.append(city2)
+        city1_key, name1 = resolve_city(city1)
+        city2_key, name2 = resolve_city(city2)
+        
+        # Look both cities up concurrently and check they are available
+        results = await asyncio.gather(
+            get_weather(city1_key), get_weather(city2_key), return_exceptions=True
+        )
+        for result in results:
+            if isinstance(result, Exception) and not isinstance(result, CityNotFoundError):
+                raise result
+        missing_cities = [
+            city for city, result in zip((city1, city2), results)
+            if isinstance(result, CityNotFoundError)
+        ]
         
         if missing_cities:
-            available_cities = ", ".join(MOCK_WEATHER_DATA.keys()).title()
-            return f"❌ Weather data not available for: {', '.join(missing_cities)}. Available cities: {available_cities}"
+            return f"❌ {await city_not_found_message(missing_cities)}"
+        
+        report1, report2 = results
+        weather1, weather2 = condition_fields(report1), condition_fields(report2)
+        temperatures = (weather1["temperature"], weather2["temperature"])
+        if all(isinstance(temp, (int, float)) for temp in temperatures):
+            temp_diff = temperatures[0] - temperatures[1]
+        else:
+            temp_diff = None
         
-        weather1 = MOCK_WEATHER_DATA[city1_key]
-        weather2 = MOCK_WEATHER_DATA[city2_key]
+        if format == 'json':
+            return to_json({
+                "cities": [
+                    {"city": name1, **current_weather_fields(report1)},
+                    {"city": name2, **current_weather_fields(report2)},
+                ],
+                "temperature_difference": temp_diff,
+            })
         
         # Create comparison
-        temp_diff = weather1["temperature"] - weather2["temperature"]
-        temp_comparison = f"{city1.title()} is {abs(temp_diff):.1f}°C {'warmer' if temp_diff > 0 else 'cooler'}" if temp_diff != 0 else "Both cities have the same temperature"
+        if temp_diff is None:
+            temp_comparison = "Temperatures can't be compared (not reported for both cities)"
+        elif temp_diff != 0:
+            temp_comparison = f"{name1} is {abs(temp_diff):.1f}°C {'warmer' if temp_diff > 0 else 'cooler'}"
+        else:
+            temp_comparison = "Both cities have the same temperature"
         
-        response = f"""⚖️ **Weather Comparison: {city1.title()} vs {city2.title()}**
+        return COMPARISON_TEMPLATE.format(
+            name1=name1,
+            name2=name2,
+            w1=weather1,
+            w2=weather2,
+            temp_comparison=temp_comparison,
+            updated=format_timestamp(min(report1.fetched_at, report2.fetched_at)),
+            staleness=staleness_note(min(report1, report2, key=lambda report: report.fetched_at)),
+        )
+        
+    except Exception as e:
+        raise McpError(
+            ErrorData(
+                code=INTERNAL_ERROR,
+                message=f"Failed to compare weather between {city1} and {city2}: {str(e)}"
+            )
+        ) from e
 
-📊 **Temperature**
-   • {city1.title()}: {weather1['temperature']}°C
-   • {city2.title()}: {weather2['temperature']}°C
-   • {temp_comparison}
+@mcp.tool()
+async def get_weather_batch(cities: List[str], format: str = "markdown") -> str:
+    """
+    Get current weather for many cities in one call.
+    
+    All lookups run concurrently and each distinct city is fetched once, so this
+    is much cheaper than calling get_current_weather once per city. A city that
+    can't be looked up gets an error row instead of failing the whole batch.
+    
+    Args:
+        cities: City names to look up (max 100; duplicates are looked up once)
+        format: "markdown" for a table or "json" for structured output
+        
+    Returns:
+        A compact table with one row per distinct city
+    """
+    try:
+        if format not in ('markdown', 'json'):
+            return f"❌ Unknown format '{format}'. Use 'markdown' or 'json'."
+        
+        # Deduplicate on the resolved city, keeping the first occurrence's order
+        unique = unique_cities(cities)
 
-☁️ **Conditions**
-   • {city1.title()}: {weather1['condition']}
-   • {city2.title()}: {weather2['condition']}
+        if not unique:
+            return "❌ Please provide at least one city"
+        if len(unique) > WEATHER_BATCH_MAX_CITIES:
+            return f"❌ At most {WEATHER_BATCH_MAX_CITIES} cities per batch (got {len(unique)})"
 
-💧 **Humidity**
-   • {city1.title()}: {weather1['humidity']}%
-   • {city2.title()}: {weather2['humidity']}%
+        results = await asyncio.gather(
+            *(get_weather(city_key) for city_key in unique), return_exceptions=True
+        )
 
-💨 **Wind Speed**
-   • {city1.title()}: {weather1['wind_speed']} km/h
-   • {city2.title()}: {weather2['wind_speed']} km/h
+        entries = []
+        rows = []
+        for city, result in zip(unique.values(), results):
+            if isinstance(result, CityNotFoundError):
+                error = "not available"
+            elif isinstance(result, Exception):
+                error = f"lookup failed: {result}"
+            else:
+                error = None
 
-*Comparison made: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}*"""
+            if format == 'json':
+                if error:
+                    entries.append({"city": city, "error": error})
+                else:
+                    entries.append({"city": city, **current_weather_fields(result)})
+            elif error:
+                rows.append(BATCH_ERROR_ROW_TEMPLATE.format(city=city, error=error))
+            else:
+                if result.status != "fresh":
+                    city = f"{city} ⚠️ {format_age(result.age_seconds)} old"
+                rows.append(BATCH_ROW_TEMPLATE.format(city=city, **condition_fields(result)))
+
+        failed = sum(1 for result in results if isinstance(result, Exception))
         
-        return response
+        if format == 'json':
+            return to_json({"cities": entries, "succeeded": len(unique) - failed, "failed": failed})
+
+        return BATCH_TEMPLATE.format(
+            count=len(unique),
+            rows="\n".join(rows),
+            succeeded=len(unique) - failed,
+            failed=failed,
+            updated=format_timestamp(datetime.now()),
+        )
+
+    except Exception as e:
+        raise McpError(
+            ErrorData(
+                code=INTERNAL_ERROR,
+                message=f"Failed to retrieve batch weather data: {str(e)}"
+            )
+        ) from e
+
+@mcp.tool()
+async def get_weather_near(lat: float, lon: float, format: str = "markdown") -> str:
+    """
+    Get current weather for the city closest to a location.
+    
+    The nearest cities are found with a spatial index; the closest one that has
+    weather data is reported, along with its distance from the given point.
+    
+    Args:
+        lat: Latitude in degrees (-90 to 90)
+        lon: Longitude in degrees (-180 to 180)
+        format: "markdown" for a readable summary or "json" for structured output
+        
+    Returns:
+        Current weather for the nearest city with data
+    """
+    try:
+        if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+            return "❌ Latitude must be between -90 and 90 and longitude between -180 and 180"
+        if format not in ('markdown', 'json'):
+            return f"❌ Unknown format '{format}'. Use 'markdown' or 'json'."
+        
+        candidates = gazetteer.nearest(lat, lon, k=NEAR_MAX_CANDIDATES)
+        for city, distance in candidates:
+            try:
+                report = await get_weather(city.key)
+            except CityNotFoundError:
+                continue
+            
+            if format == 'json':
+                return to_json({
+                    "city": city.name,
+                    "lat": city.lat,
+                    "lon": city.lon,
+                    "distance_km": distance,
+                    **current_weather_fields(report),
+                })
+            
+            return NEAR_TEMPLATE.format(
+                distance=distance,
+                lat=lat,
+                lon=lon,
+                current=CURRENT_WEATHER_TEMPLATE.format(
+                    city=city.name,
+                    updated=format_timestamp(report.fetched_at),
+                    staleness=staleness_note(report),
+                    **condition_fields(report)
+                ),
+            )
+        
+        nearby = ", ".join(f"{city.name} ({distance} km)" for city, distance in candidates)
+        return f"❌ No weather data for any city near {lat}, {lon}. Nearest cities: {nearby or 'none'}"
         
     except Exception as e:
         raise McpError(
             ErrorData(
                 code=INTERNAL_ERROR,
-                message=f"Failed to compare weather between {city1} and {city2}: {str(e)}"
+                message=f"Failed to retrieve weather near {lat}, {lon}: {str(e)}"
             )
         ) from e
 
-@mcp.resource("weather://cities")
-def list_available_cities() -> str:
+def render_cities_resource(registry: CityRegistry) -> str:
+    return CITIES_TEMPLATE.format(
+        city_lines="".join(f"{i}. {city.title()}\n" for i, city in enumerate(registry.cities, 1)),
+        count=len(registry.cities),
+        updated=format_timestamp(registry.changed_at),
+    )
+
+
+def render_weather_prompt(registry: CityRegistry) -> str:
+    cities = ", ".join(city.title() for city in registry.cities[:CITY_HINT_MAX])
+    if len(registry.cities) > CITY_HINT_MAX:
+        cities += f" and {len(registry.cities) - CITY_HINT_MAX} more (see the weather://cities resource)"
+    return WEATHER_PROMPT_TEMPLATE.format(cities=cities or "see the weather://cities resource")
+
+
+# Sessions that have read weather://cities, to be told when it changes.
+# FastMCP advertises subscribe=False, so resources/updated would go to clients
+# that never subscribed; resources/list_changed is the notification a server
+# may send unprompted, and tells the client to re-list and re-read.
+cities_readers: "weakref.WeakSet[ServerSession]" = weakref.WeakSet()
+
+
+async def notify_cities_changed() -> None:
+    """Tell clients that have read weather://cities that it has new content."""
+    for session in list(cities_readers):
+        try:
+            await session.send_resource_list_changed()
+        except Exception:
+            # The client went away
+            cities_readers.discard(session)
+
+
+city_registry.add_listener(notify_cities_changed)
+
+
+@mcp.resource(CITIES_RESOURCE_URI)
+async def list_available_cities() -> str:
     """
     List all cities for which weather data is available.
     
-    This resource provides a reference of supported locations.
+    This resource provides a reference of supported locations. The listing is
+    rendered once per change to the city list; clients that have read it get a
+    resources/list_changed notification when it changes.
     """
-    cities = list(MOCK_WEATHER_DATA.keys())
-    response = "🏙️ **Available Cities for Weather Data**\n\n"
-    
-    for i, city in enumerate(cities, 1):
-        response += f"{i}. {city.title()}\n"
-    
-    response += f"\n*Total: {len(cities)} cities available*"
-    response += f"\n*Data last updated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}*"
-    
-    return response
+    await city_registry.ensure_loaded()
+    cities_readers.add(mcp.get_context().session)
+    return city_registry.render("resource", render_cities_resource)
 
 @mcp.prompt()
-def weather_assistant_prompt() -> str:
+async def weather_assistant_prompt() -> str:
     """
     A specialized prompt for weather-related assistance.
     
     This prompt configures the assistant to be helpful with weather queries
     and provides guidance on available capabilities.
     """
-    print(f"prompt is being used {datetime}")
-    return """You are a helpful weather assistant with access to weather information tools. 
-
-                **Your capabilities include:**
-
-                 **Current Weather**: Use `get_current_weather(city)` to get current conditions
-                 **Forecasts**: Use `get_weather_forecast(city, days)` for multi-day predictions  
-                 **Comparisons**: Use `compare_weather(city1, city2)` to compare conditions
-                 **Available Cities**: Reference the `weather://cities` resource for supported locations
-
-                **Available cities**: New York, London, Tokyo, San Francisco
-
-                **Tips for great weather assistance:**
-                - Always provide specific, actionable information
-                - Include relevant details like temperature, conditions, and humidity
-                - Suggest appropriate clothing or activities based on conditions
-                - Offer comparisons when helpful
-                - Be conversational and helpful in your responses
-
-                Please help users with their weather-related questions using these tools!
-            """
+    await city_registry.ensure_loaded()
+    return city_registry.render("prompt", render_weather_prompt)
 
 if __name__ == "__main__":
-    print(" Weather Assistant MCP Server Starting...")
-    print("=" * 50)
-    print(" Server will run on stdio (for Claude Desktop)")
-    print(" Available cities: New York, London, Tokyo, San Francisco")
-    print(" Available tools:")
-    print("   • get_current_weather(city)")
-    print("   • get_weather_forecast(city, days)")
-    print("   • compare_weather(city1, city2)")
-    print(" Available resources:")
-    print("   • weather://cities")
-    print(" Available prompts:")
-    print("   • weather_assistant_prompt")
-    print("\n To use with Claude Desktop:")
-    print("   1. Add server to Claude Desktop config")
-    print("   2. Restart Claude Desktop")
-    print("   3. Ask about weather in any supported city")
-    print("\n Starting server...")
+    parser = argparse.ArgumentParser(description="Weather Assistant MCP server")
+    parser.add_argument("--transport", default="stdio", choices=["stdio", "streamable-http"])
+    parser.add_argument("--host", default=mcp.settings.host)
+    parser.add_argument("--port", type=int, default=mcp.settings.port)
+    args = parser.parse_args()
+    mcp.settings.host = args.host
+    mcp.settings.port = args.port
+    weather_cache.enable_snapshot(WEATHER_SNAPSHOT_PATH)
+
+    where = "stdio (for Claude Desktop)" if args.transport == "stdio" else f"http://{args.host}:{args.port}{mcp.settings.streamable_http_path}"
+    # The banner goes to stderr: on the stdio transport, stdout carries the protocol
+    banner = [
+        " Weather Assistant MCP Server Starting...",
+        "=" * 50,
+        f" Server will run on {where}",
+        f" Weather provider: {weather_cache.provider.name}",
+        " Available tools:",
+        "   • get_current_weather(city)",
+        "   • get_weather_forecast(city, days)",
+        "   • compare_weather(city1, city2)",
+        "   • get_weather_batch(cities)",
+        "   • get_weather_near(lat, lon)",
+        "   • get_forecast_range(city, horizon, start, count)",
+        "   • get_forecast_stats(cities, field, horizon, start, count)",
+        " Available resources:",
+        "   • weather://cities (lists the supported cities)",
+        " Available prompts:",
+        "   • weather_assistant_prompt",
+        "\n To use with Claude Desktop:",
+        "   1. Add server to Claude Desktop config",
+        "   2. Restart Claude Desktop",
+        "   3. Ask about weather in any supported city",
+        "\n Starting server...",
+    ]
+    print("\n".join(banner), file=sys.stderr)
     
-    # Run the server using stdio transport (standard for Claude Desktop)
-    mcp.run(transport="stdio")
+    async def serve() -> None:
+        # Same as mcp.run(transport=...), but closes the provider's connections on the way out
+        try:
+            if args.transport == "stdio":
+                # stdio is the standard transport for Claude Desktop
+                await mcp.run_stdio_async()
+            else:
+                await mcp.run_streamable_http_async()
+        finally:
+            await weather_cache.provider.aclose()
+
+    anyio.run(serve)
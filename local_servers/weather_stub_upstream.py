@@ -0,0 +1,75 @@
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote
+
+from weather_server import MOCK_WEATHER_DATA
+
+# Local stand-in for a real weather API, for testing HttpWeatherProvider
+# and benchmarking without network access or API keys.
+#
+# Endpoints:
+#   GET /weather/{city}  -> the MOCK_WEATHER_DATA report for the city, 404 if unknown
+#   GET /cities          -> list of known cities
+#   GET /stats           -> number of requests served per endpoint
+#
+# Usage:
+#   python weather_stub_upstream.py --port 8081 --delay 0.2
+#   WEATHER_PROVIDER=http WEATHER_API_URL=http://localhost:8081 python weather_server.py
+
+request_counts = {"weather": 0, "cities": 0}
+counts_lock = threading.Lock()
+
+
+class StubWeatherHandler(BaseHTTPRequestHandler):
+    # Simulated upstream latency in seconds, set from --delay
+    delay = 0.0
+
+    def do_GET(self):
+        parts = [unquote(part) for part in self.path.strip("/").split("/")]
+
+        if parts[0] == "stats":
+            with counts_lock:
+                return self.send_json(200, dict(request_counts))
+
+        if parts[0] in request_counts:
+            with counts_lock:
+                request_counts[parts[0]] += 1
+        if self.delay:
+            time.sleep(self.delay)
+
+        if parts[0] == "cities":
+            return self.send_json(200, list(MOCK_WEATHER_DATA.keys()))
+        if parts[0] == "weather" and len(parts) == 2:
+            city_key = parts[1].lower().strip()
+            if city_key in MOCK_WEATHER_DATA:
+                return self.send_json(200, MOCK_WEATHER_DATA[city_key])
+            return self.send_json(404, {"error": f"unknown city '{parts[1]}'"})
+        return self.send_json(404, {"error": "not found"})
+
+    def send_json(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Keep the console quiet; use /stats to see traffic
+        pass
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stub weather API for local testing")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--delay", type=float, default=0.0, help="simulated latency per request in seconds")
+    args = parser.parse_args()
+
+    StubWeatherHandler.delay = args.delay
+    server = ThreadingHTTPServer((args.host, args.port), StubWeatherHandler)
+    print(f" Stub weather API listening on http://{args.host}:{args.port} (delay {args.delay}s)")
+    server.serve_forever()
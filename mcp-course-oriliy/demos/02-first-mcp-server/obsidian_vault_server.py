@@ -3,7 +3,8 @@
 # requires-python = ">=3.9"
 # dependencies = [
 #     "mcp[cli]==1.9.3",
-#     "pydantic>=2.0.0"
+#     "pydantic>=2.0.0",
+#     "watchdog>=3.0.0"
 # ]
 # ///
 
@@ -21,14 +22,42 @@ https://github.com/modelcontextprotocol/python-sdk
 """
 
 import asyncio
+import base64
+import hashlib
+import heapq
 import os
 import json
-from typing import Dict, Any, Optional, List
+import mmap
+import re
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict
+from typing import Dict, Any, Optional, List, NamedTuple, Iterator, Tuple, Callable
 from datetime import datetime
 from pathlib import Path
 from mcp.server.fastmcp import FastMCP
 from mcp.shared.exceptions import McpError
 from mcp.types import ErrorData, INTERNAL_ERROR, INVALID_PARAMS
+from pydantic import BaseModel, Field
+
+# fcntl provides advisory file locks for coordinating writes between server
+# processes; it isn't available on Windows, where only in-process locks apply
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# watchdog gives us native change notifications (inotify on Linux, FSEvents on
+# macOS); without it the vault watcher falls back to periodic mtime polling
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:
+    FileSystemEventHandler = object
+    Observer = None
 
 # Create MCP server instance with a descriptive name
 mcp = FastMCP("obsidian-vault")
@@ -42,6 +71,48 @@ DEFAULT_VAULT_PATH = os.environ.get(
 
 print(DEFAULT_VAULT_PATH)
 
+# Configuration: Where the persistent note index is stored
+# You can override this with the OBSIDIAN_INDEX_DIR environment variable
+INDEX_DIR = os.environ.get(
+    "OBSIDIAN_INDEX_DIR",
+    str(Path.home() / ".cache" / "obsidian-vault-mcp")
+)
+
+# Minimum number of seconds between two incremental index refreshes
+INDEX_REFRESH_SECONDS = float(os.environ.get("OBSIDIAN_INDEX_REFRESH_SECONDS", "5"))
+
+# Bump this whenever the index schema changes; stale indexes are rebuilt
+INDEX_SCHEMA_VERSION = 4
+
+# Background watcher settings: set OBSIDIAN_WATCH=0 to disable the watcher,
+# in which case the index is refreshed on demand by the tools instead
+WATCH_ENABLED = os.environ.get("OBSIDIAN_WATCH", "1") != "0"
+WATCH_DEBOUNCE_SECONDS = float(os.environ.get("OBSIDIAN_WATCH_DEBOUNCE_SECONDS", "0.5"))
+WATCH_MAX_DELAY_SECONDS = float(os.environ.get("OBSIDIAN_WATCH_MAX_DELAY_SECONDS", "5"))
+WATCH_POLL_SECONDS = float(os.environ.get("OBSIDIAN_WATCH_POLL_SECONDS", "10"))
+
+# Largest page list_notes will return in a single call
+LIST_NOTES_MAX_PAGE = 200
+
+# Largest number of notes create_notes_batch accepts in one request
+CREATE_BATCH_MAX_NOTES = 1000
+
+# Number of lock files that note paths are spread over for cross-process locking
+PATH_LOCK_STRIPES = 256
+
+# Number of notes whose heading offset tables are kept in memory
+HEADING_CACHE_SIZE = 256
+
+# Limits for get_neighbors graph traversals
+NEIGHBORS_MAX_DEPTH = 3
+NEIGHBORS_MAX_NOTES = 200
+
+# Most matches search ranks per query; broader queries rank the newest notes only
+SEARCH_MAX_CANDIDATES = 2000
+
+# [[Target]], [[Target|alias]], [[Target#heading]] and ![[Embed]] links
+WIKILINK_PATTERN = re.compile(r"\[\[([^\[\]|#^\n]+)(?:[#^][^\[\]|\n]*)?(?:\|[^\[\]\n]*)?\]\]")
+
 def get_vault_path() -> Path:
     """
     Get the configured Obsidian vault path.
@@ -63,6 +134,9 @@ def get_vault_path() -> Path:
             
     return vault_path
 
+# Note types that get a dedicated template in create_note
+VALID_NOTE_TYPES = ['general', 'idea', 'project', 'daily', 'reference', 'meeting']
+
 def sanitize_filename(filename: str) -> str:
     """
     Sanitize a filename to be safe for the filesystem.
@@ -84,6 +158,11 @@ def sanitize_filename(filename: str) -> str:
     
     return filename
 
+def note_relative_path(folder: str, title: str) -> str:
+    """Vault-relative path of the note created for `title` in `folder` ('' for the root)."""
+    filename = sanitize_filename(title)
+    return (Path(folder) / filename).as_posix() if folder else filename
+
 def format_note_metadata(title: str, tags: List[str], note_type: str) -> str:
     """
     Create YAML frontmatter metadata for an Obsidian note.
@@ -108,78 +187,1367 @@ tags: {' '.join([f'#{tag}' for tag in tags])}
 """
     return metadata
 
+def exclusive_write_text(path: Path, text: str) -> None:
+    """
+    Atomically create a new file, failing if it already exists.
+
+    The content is written to a temporary file which is then hard-linked to the
+    final name. Linking never replaces an existing file, so of two writers
+    racing to create the same note exactly one wins and the other gets
+    FileExistsError, and nobody ever sees a half-written note.
+
+    The temporary file is created with mode 0666 minus the umask (not the 0600
+    that tempfile.mkstemp uses), so notes get the same permissions as a plain
+    write would give them.
+
+    Raises:
+        FileExistsError: If the file already exists
+    """
+    tmp_name = str(path.parent / f'.{uuid.uuid4().hex}.tmp')
+    fd = os.open(tmp_name, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o666)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as tmp_file:
+            tmp_file.write(text)
+        try:
+            os.link(tmp_name, path)
+        except FileExistsError:
+            raise
+        except OSError:
+            # File systems without hard links: fall back to an exclusive open
+            with open(path, 'x', encoding='utf-8') as note_file:
+                note_file.write(text)
+    finally:
+        Path(tmp_name).unlink(missing_ok=True)
+
+class PathLockManager:
+    """
+    Per-path locks for vault writes, both within and across server processes.
+
+    In-process, every note path gets its own lock, created on demand and
+    dropped when no thread holds or waits for it. Across processes, paths are
+    hashed onto PATH_LOCK_STRIPES lock files that are locked with advisory
+    `flock`, so writers of different notes rarely contend and nothing is
+    serialised behind a single global lock.
+    """
+
+    def __init__(self, lock_dir: Path, stripes: int):
+        self.lock_dir = lock_dir
+        self.stripes = stripes
+        self._guard = threading.Lock()
+        self._locks: Dict[str, List[Any]] = {}
+
+    def _acquire_local(self, key: str) -> threading.Lock:
+        with self._guard:
+            entry = self._locks.get(key)
+            if entry is None:
+                entry = self._locks[key] = [threading.Lock(), 0]
+            entry[1] += 1
+        entry[0].acquire()
+        return entry[0]
+
+    def _release_local(self, key: str) -> None:
+        with self._guard:
+            entry = self._locks[key]
+            entry[0].release()
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self._locks[key]
+
+    def lock(self, rel_path: str) -> "_PathLock":
+        """Context manager holding the lock for one vault-relative note path."""
+        return _PathLock(self, rel_path)
+
+class _PathLock:
+    def __init__(self, manager: PathLockManager, rel_path: str):
+        self.manager = manager
+        self.key = rel_path.lower()
+        self._file = None
+
+    def __enter__(self) -> "_PathLock":
+        self.manager._acquire_local(self.key)
+        if fcntl is not None:
+            try:
+                self.manager.lock_dir.mkdir(parents=True, exist_ok=True)
+                stripe = int(hashlib.sha1(self.key.encode('utf-8')).hexdigest(), 16) % self.manager.stripes
+                self._file = open(self.manager.lock_dir / f"{stripe:03d}.lock", 'a+b')
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+            except BaseException:
+                if self._file is not None:
+                    self._file.close()
+                    self._file = None
+                self.manager._release_local(self.key)
+                raise
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        if self._file is not None:
+            # Closing the file releases the flock
+            self._file.close()
+            self._file = None
+        self.manager._release_local(self.key)
+
+def build_note_content(title: str, content: str, tag_list: List[str], note_type: str) -> str:
+    """
+    Build the full text of a new note: frontmatter, type template, content and footer.
+    
+    Args:
+        title: The note title
+        content: The user's markdown content
+        tag_list: Tags for the frontmatter
+        note_type: One of VALID_NOTE_TYPES
+        
+    Returns:
+        The complete markdown text to write to disk
+    """
+    # Generate the note content with metadata
+    frontmatter = format_note_metadata(title, tag_list, note_type)
+    
+    # Add structure based on note type
+    structured_content = frontmatter + f"# {title}\n\n"
+    
+    # Add type-specific template structure
+    if note_type == 'project':
+        structured_content += """## Overview
+
+
+## Goals
+- [ ] 
+
+## Tasks
+- [ ] 
+
+## Resources
+
+
+## Notes
+
+"""
+    elif note_type == 'meeting':
+        structured_content += f"""## Meeting Details
+**Date**: {datetime.now().strftime('%Y-%m-%d')}
+**Attendees**: 
+**Purpose**: 
+
+## Agenda
+
+
+## Discussion
+
+
+## Action Items
+- [ ] 
+
+## Next Steps
+
+
+"""
+    elif note_type == 'daily':
+        structured_content += f"""## {datetime.now().strftime('%A, %B %d, %Y')}
+
+### Morning Thoughts
+
+
+### Today's Tasks
+- [ ] 
+
+### Notes
+
+
+### Reflection
+
+
+"""
+    elif note_type == 'idea':
+        structured_content += """## The Idea
+
+
+## Why This Matters
+
+
+## Implementation Thoughts
+
+
+## Next Steps
+- [ ] Research
+- [ ] Prototype
+- [ ] Validate
+
+"""
+    
+    # Add the user's content
+    structured_content += content
+    
+    # Add footer with creation context
+    structured_content += f"""
+
+---
+*Created via MCP Server on {datetime.now().strftime('%Y-%m-%d at %H:%M:%S')}*
+"""
+    
+    return structured_content
+
+def parse_frontmatter(content: str) -> Dict[str, Any]:
+    """
+    Parse the YAML frontmatter block at the top of a note.
+
+    Only the subset of YAML that Obsidian notes use in practice is supported:
+    `key: value` pairs, inline lists (`[a, b]`) and block lists (`- a`).
+
+    Args:
+        content: The full text of the note
+
+    Returns:
+        Dictionary of frontmatter keys to string or list values
+    """
+    lines = content.split('\n')
+    if not lines or lines[0].strip() != '---':
+        return {}
+
+    metadata: Dict[str, Any] = {}
+    current_key = None
+    for line in lines[1:]:
+        stripped = line.strip()
+        if stripped == '---':
+            break
+
+        # Block list item belonging to the previous key
+        if stripped.startswith('- ') and current_key:
+            value = metadata.get(current_key)
+            if not isinstance(value, list):
+                value = [value] if value else []
+                metadata[current_key] = value
+            value.append(stripped[2:].strip().strip('"\''))
+            continue
+
+        if ':' in line and not line[0].isspace():
+            key, value = line.split(':', 1)
+            current_key = key.strip()
+            value = value.strip()
+            if value.startswith('[') and value.endswith(']'):
+                metadata[current_key] = [
+                    item.strip().strip('"\'') for item in value[1:-1].split(',') if item.strip()
+                ]
+            else:
+                metadata[current_key] = value.strip('"\'')
+
+    return metadata
+
+def split_frontmatter(content: str) -> Tuple[str, str]:
+    """
+    Split a note into its raw frontmatter block and the markdown body after it.
+
+    Returns:
+        (frontmatter text without the `---` fences, body text)
+    """
+    if not content.startswith('---'):
+        return '', content
+    end = content.find('\n---', 3)
+    if end == -1:
+        return '', content
+    body_start = content.find('\n', end + 4)
+    body = content[body_start + 1:] if body_start != -1 else ''
+    return content[3:end].strip('\n'), body
+
+def normalize_tags(value: Any) -> List[str]:
+    """
+    Turn a frontmatter `tags` value into a clean list of lowercase tags.
+
+    Accepts both the `#tag1 #tag2` form written by `format_note_metadata`
+    and YAML lists, with or without leading `#`.
+    """
+    if not value:
+        return []
+    items = value if isinstance(value, list) else [value]
+    tags = []
+    for item in items:
+        for tag in str(item).replace(',', ' ').split():
+            tag = tag.lstrip('#').strip().lower()
+            if tag and tag not in tags:
+                tags.append(tag)
+    return tags
+
+def extract_title(content: str, metadata: Dict[str, Any], fallback: str) -> str:
+    """
+    Find the display title of a note: frontmatter title, first # heading, or filename.
+    """
+    title = metadata.get('title')
+    if isinstance(title, str) and title:
+        return title
+
+    for line in content.split('\n'):
+        if line.startswith('# '):
+            return line.replace('# ', '').strip()
+
+    return fallback
+
+def link_key(name: str) -> str:
+    """Normalise a note name or wikilink target for link resolution."""
+    key = name.strip().replace('\\', '/').lower()
+    return key[:-3] if key.endswith('.md') else key
+
+def extract_wikilinks(content: str) -> List[str]:
+    """
+    Return the distinct, normalised targets of all wikilinks in a note.
+
+    Aliases (`|alias`) and heading or block anchors (`#heading`, `^block`) are
+    dropped, so `[[My Note#Tasks|tasks]]` links to `my note`.
+    """
+    targets = []
+    for match in WIKILINK_PATTERN.finditer(content):
+        key = link_key(match.group(1))
+        if key and key not in targets:
+            targets.append(key)
+    return targets
+
+def build_search_expression(query: str, match_all: bool = True) -> str:
+    """
+    Turn free-form user text into a safe SQLite FTS5 MATCH expression.
+
+    Every word is quoted so punctuation in the query can't be parsed as FTS syntax.
+
+    Args:
+        query: The user's search text
+        match_all: Require every word (AND) instead of any word (OR)
+
+    Returns:
+        The MATCH expression, or an empty string if the query has no words
+    """
+    terms = [f'"{term}"' for term in re.findall(r"\w+", query.lower())]
+    if not terms:
+        return ''
+    return (' AND ' if match_all else ' OR ').join(terms)
+
+def folder_tokens(folder: str) -> str:
+    """
+    Encode a folder and each of its parent folders as one FTS5 token apiece.
+
+    Indexing these lets a search restrict itself to a folder subtree inside
+    the MATCH expression instead of joining every match against the notes table.
+    """
+    parts = [part for part in folder.strip('/').split('/') if part]
+    return ' '.join(
+        'f' + hashlib.sha1('/'.join(parts[:depth]).encode('utf-8')).hexdigest()[:16]
+        for depth in range(1, len(parts) + 1)
+    )
+
+def encode_cursor(mtime: float, path: str) -> str:
+    """Encode the position after a note as an opaque pagination cursor."""
+    raw = json.dumps([mtime, path], separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor: str) -> Tuple[float, str]:
+    """
+    Decode a cursor produced by encode_cursor.
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        mtime, path = json.loads(raw)
+        return float(mtime), str(path)
+    except Exception as e:
+        raise ValueError(f"invalid cursor: {cursor!r}") from e
+
+def trigrams(text: str) -> set:
+    """Return the set of character trigrams of a lowercased, space-padded string."""
+    padded = f"  {' '.join(text.lower().split())} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+class FuzzyNameIndex:
+    """
+    In-memory trigram index of note paths for typo-tolerant name lookups.
+
+    Each note is indexed under the trigrams of its path and of its bare name
+    (both without `.md`). Lookups use prefix filtering: a note can only reach
+    the minimum score if it contains one of the query's rarest trigrams, so
+    only those short posting lists are scanned for candidates instead of
+    comparing against every note in the vault.
+    """
+
+    def __init__(self):
+        self._postings: Dict[str, set] = {}
+        self._grams: Dict[str, set] = {}
+        self._name_sizes: Dict[str, int] = {}
+
+    def add(self, rel_path: str) -> None:
+        self.remove(rel_path)
+        key = rel_path[:-3] if rel_path.endswith('.md') else rel_path
+        name_grams = trigrams(key.rsplit('/', 1)[-1])
+        grams = trigrams(key) | name_grams
+        self._grams[rel_path] = grams
+        self._name_sizes[rel_path] = len(name_grams)
+        for gram in grams:
+            self._postings.setdefault(gram, set()).add(rel_path)
+
+    def remove(self, rel_path: str) -> None:
+        self._name_sizes.pop(rel_path, None)
+        for gram in self._grams.pop(rel_path, ()):
+            posting = self._postings.get(gram)
+            if posting is not None:
+                posting.discard(rel_path)
+                if not posting:
+                    del self._postings[gram]
+
+    def search(self, query: str, limit: int = 5, min_score: float = 0.6) -> List[Tuple[str, float]]:
+        """
+        Find the notes whose paths best match `query`.
+
+        Candidates are scored by the share of the query's trigrams they contain,
+        with the Dice coefficient against the bare note name as a tie-breaker
+        that favours closer lengths regardless of folder depth,
+        so both partial names and small typos rank the intended note first.
+
+        Returns:
+            List of (path, score) pairs, best match first
+        """
+        query_grams = trigrams(query)
+        if not query_grams:
+            return []
+
+        # A match needs at least `required` of the query's trigrams, so it must
+        # contain at least one of the (len - required + 1) rarest ones
+        required = max(1, int(len(query_grams) * min_score + 0.999))
+        by_rarity = sorted(query_grams, key=lambda gram: len(self._postings.get(gram, ())))
+        candidates: set = set()
+        for gram in by_rarity[:len(query_grams) - required + 1]:
+            candidates.update(self._postings.get(gram, ()))
+
+        scored = []
+        for path in candidates:
+            hits = len(query_grams & self._grams[path])
+            if hits < required:
+                continue
+            dice = 2 * hits / (len(query_grams) + self._name_sizes[path])
+            scored.append((hits / len(query_grams), dice, path))
+
+        best = heapq.nlargest(limit, scored)
+        return [(path, round(containment, 3)) for containment, _, path in best]
+
+class NoteRecord(NamedTuple):
+    """A single row of the note index."""
+    path: str
+    folder: str
+    mtime: float
+    size: int
+    title: str
+    tags: List[str]
+    note_type: str
+
+class TagIndex:
+    """
+    In-memory columnar index of frontmatter tags, note types and mtimes.
+
+    Tags and types map to sets of note paths, so filtering by any combination
+    of them is a set intersection (or union) rather than a scan over every note.
+    Both are matched case-insensitively.
+    """
+
+    def __init__(self):
+        self._by_tag: Dict[str, set] = {}
+        self._by_type: Dict[str, set] = {}
+        self._notes: Dict[str, Tuple[Tuple[str, ...], str, float]] = {}
+
+    def add(self, record: NoteRecord) -> None:
+        self.remove(record.path)
+        note_type = record.note_type.lower()
+        self._notes[record.path] = (tuple(record.tags), note_type, record.mtime)
+        for tag in record.tags:
+            self._by_tag.setdefault(tag, set()).add(record.path)
+        self._by_type.setdefault(note_type, set()).add(record.path)
+
+    def remove(self, rel_path: str) -> None:
+        entry = self._notes.pop(rel_path, None)
+        if entry is None:
+            return
+        tags, note_type, _ = entry
+        for column, keys in ((self._by_tag, tags), (self._by_type, (note_type,))):
+            for key in keys:
+                paths = column.get(key)
+                if paths is not None:
+                    paths.discard(rel_path)
+                    if not paths:
+                        del column[key]
+
+    def query(
+        self,
+        tags: List[str],
+        note_type: str = "",
+        modified_after: Optional[float] = None,
+        match_all: bool = True
+    ) -> List[Tuple[str, float]]:
+        """
+        Find notes by tags, type and modification time.
+
+        Args:
+            tags: Tags to filter on (lowercase, without '#')
+            note_type: Only notes of this type (empty for any)
+            modified_after: Only notes modified after this timestamp
+            match_all: Require every tag (True) or any of them (False)
+
+        Returns:
+            List of (path, mtime) pairs, newest first
+        """
+        sets = []
+        if tags:
+            tag_sets = [self._by_tag.get(tag, set()) for tag in tags]
+            if match_all:
+                sets.extend(tag_sets)
+            else:
+                sets.append(set().union(*tag_sets))
+        if note_type:
+            sets.append(self._by_type.get(note_type.strip().lower(), set()))
+
+        if sets:
+            # Intersect smallest first so the working set shrinks quickly
+            sets.sort(key=len)
+            paths = set(sets[0])
+            for other in sets[1:]:
+                paths &= other
+        else:
+            paths = self._notes.keys()
+
+        results = [(path, self._notes[path][2]) for path in paths]
+        if modified_after is not None:
+            results = [(path, mtime) for path, mtime in results if mtime > modified_after]
+        results.sort(key=lambda item: (-item[1], item[0]))
+        return results
+
+    def tag_counts(self) -> Counter:
+        """Number of notes carrying each tag."""
+        return Counter({tag: len(paths) for tag, paths in self._by_tag.items()})
+
+class VaultIndex:
+    """
+    Persistent, incrementally refreshed index of the notes in a vault.
+
+    The index lives in a SQLite database under INDEX_DIR and stores one row per
+    note with its path, mtime, size, title, tags and type. A refresh only walks
+    directory entries and re-parses the files whose mtime or size changed, so
+    the tools can answer listing and statistics questions without opening notes.
+    """
+
+    def __init__(self, vault_path: Path, index_dir: Path):
+        self.vault_path = vault_path
+        index_dir.mkdir(parents=True, exist_ok=True)
+        digest = hashlib.sha1(str(vault_path.resolve()).encode('utf-8')).hexdigest()[:12]
+        self.db_path = index_dir / f"vault-{digest}.sqlite3"
+        self._lock = threading.RLock()
+        self._last_refresh = 0.0
+        self._conn = self._connect()
+
+        # In-memory caches kept in step with the database by _write():
+        # (mtime, size) per note for cheap change detection, titles,
+        # note counts per folder, the total vault size, the fuzzy name
+        # index and the tag/type index
+        self._stamps: Dict[str, Tuple[float, int]] = {}
+        self._titles: Dict[str, str] = {}
+        self._folder_counts: Counter = Counter()
+        self._total_size = 0
+        self._names = FuzzyNameIndex()
+        self._tags = TagIndex()
+        for row in self._conn.execute("SELECT * FROM notes"):
+            self._cache_add(self._row_to_record(row))
+
+        # Callbacks notified with (changed records, removed paths) after every write
+        self._listeners: List[Callable[[List[NoteRecord], List[str]], None]] = []
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+
+        # The index is only a cache, so an outdated schema is simply rebuilt
+        if conn.execute("PRAGMA user_version").fetchone()[0] != INDEX_SCHEMA_VERSION:
+            conn.close()
+            for suffix in ('', '-wal', '-shm'):
+                Path(str(self.db_path) + suffix).unlink(missing_ok=True)
+            conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS notes (
+                id INTEGER PRIMARY KEY,
+                path TEXT NOT NULL UNIQUE,
+                folder TEXT NOT NULL,
+                name_key TEXT NOT NULL,
+                path_key TEXT NOT NULL,
+                mtime REAL NOT NULL,
+                size INTEGER NOT NULL,
+                title TEXT NOT NULL,
+                tags TEXT NOT NULL,
+                note_type TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS notes_by_mtime ON notes (mtime DESC, path);
+            CREATE INDEX IF NOT EXISTS notes_by_folder ON notes (folder);
+            CREATE INDEX IF NOT EXISTS notes_by_name_key ON notes (name_key);
+            CREATE INDEX IF NOT EXISTS notes_by_path_key ON notes (path_key);
+            -- Wikilink graph: one row per (source note, normalised link target)
+            CREATE TABLE IF NOT EXISTS links (
+                src_id INTEGER NOT NULL,
+                target TEXT NOT NULL,
+                PRIMARY KEY (src_id, target)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS links_by_target ON links (target);
+            -- Full-text index keyed by notes.id (rowid) for ranked search
+            CREATE VIRTUAL TABLE IF NOT EXISTS notes_fts USING fts5(
+                title,
+                frontmatter,
+                body,
+                folders,
+                tokenize = 'unicode61 remove_diacritics 2'
+            );
+        """)
+        conn.execute(f"PRAGMA user_version = {INDEX_SCHEMA_VERSION}")
+        conn.commit()
+        return conn
+
+    def _cache_add(self, record: NoteRecord) -> None:
+        self._cache_remove(record.path)
+        self._stamps[record.path] = (record.mtime, record.size)
+        self._titles[record.path] = record.title
+        self._names.add(record.path)
+        self._tags.add(record)
+        self._folder_counts[record.folder] += 1
+        self._total_size += record.size
+
+    def _cache_remove(self, path: str) -> None:
+        stamp = self._stamps.pop(path, None)
+        if stamp is None:
+            return
+        self._titles.pop(path, None)
+        self._names.remove(path)
+        self._tags.remove(path)
+        folder = Path(path).parent.as_posix()
+        folder = '' if folder == '.' else folder
+        self._folder_counts[folder] -= 1
+        if self._folder_counts[folder] <= 0:
+            del self._folder_counts[folder]
+        self._total_size -= stamp[1]
+
+    def add_listener(self, listener: Callable[[List[NoteRecord], List[str]], None]) -> None:
+        """Register a callback invoked with (changed records, removed paths) after each update."""
+        self._listeners.append(listener)
+
+    def _scan(self) -> Iterator[Tuple[str, os.stat_result]]:
+        """Yield (relative path, stat) for every markdown file in the vault."""
+        if not self.vault_path.is_dir():
+            return
+
+        pending = [self.vault_path]
+        while pending:
+            directory = pending.pop()
+            try:
+                entries = list(os.scandir(directory))
+            except OSError:
+                continue
+            for entry in entries:
+                # Skip Obsidian's own config, trash and VCS folders
+                if entry.name.startswith('.'):
+                    continue
+                if entry.is_dir(follow_symlinks=False):
+                    pending.append(Path(entry.path))
+                elif entry.name.endswith('.md') and entry.is_file():
+                    rel_path = Path(entry.path).relative_to(self.vault_path).as_posix()
+                    yield rel_path, entry.stat()
+
+    def _parse_note(self, rel_path: str, stats: os.stat_result) -> Tuple[NoteRecord, str]:
+        """Read a single note from disk and build its index record.
+
+        Returns:
+            The index record and the note content, which feeds the full-text index
+        """
+        full_path = self.vault_path / rel_path
+        try:
+            content = full_path.read_text(encoding='utf-8', errors='replace')
+        except OSError:
+            content = ''
+        metadata = parse_frontmatter(content)
+        folder = Path(rel_path).parent.as_posix()
+        record = NoteRecord(
+            path=rel_path,
+            folder='' if folder == '.' else folder,
+            mtime=stats.st_mtime,
+            size=stats.st_size,
+            title=extract_title(content, metadata, full_path.stem),
+            tags=normalize_tags(metadata.get('tags')),
+            note_type=str(metadata.get('type') or 'general'),
+        )
+        return record, content
+
+    def _write(self, parsed: List[Tuple[NoteRecord, str]], removed: List[str]) -> None:
+        """Persist changed notes and drop removed notes in one transaction."""
+        records = [record for record, _ in parsed]
+        with self._conn:
+            for path in removed:
+                row = self._conn.execute("SELECT id FROM notes WHERE path = ?", (path,)).fetchone()
+                if row:
+                    self._conn.execute("DELETE FROM notes_fts WHERE rowid = ?", (row['id'],))
+                    self._conn.execute("DELETE FROM links WHERE src_id = ?", (row['id'],))
+                    self._conn.execute("DELETE FROM notes WHERE id = ?", (row['id'],))
+
+            for record, content in parsed:
+                self._conn.execute(
+                    "INSERT INTO notes "
+                    "(path, folder, name_key, path_key, mtime, size, title, tags, note_type) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT (path) DO UPDATE SET "
+                    "folder = excluded.folder, name_key = excluded.name_key, "
+                    "path_key = excluded.path_key, mtime = excluded.mtime, size = excluded.size, "
+                    "title = excluded.title, tags = excluded.tags, note_type = excluded.note_type",
+                    (record.path, record.folder, link_key(Path(record.path).name),
+                     link_key(record.path), record.mtime, record.size, record.title,
+                     ' '.join(record.tags), record.note_type),
+                )
+                note_id = self._conn.execute(
+                    "SELECT id FROM notes WHERE path = ?", (record.path,)
+                ).fetchone()['id']
+
+                # Keep the full-text index in step with the notes table
+                frontmatter, body = split_frontmatter(content)
+                self._conn.execute("DELETE FROM notes_fts WHERE rowid = ?", (note_id,))
+                self._conn.execute(
+                    "INSERT INTO notes_fts (rowid, title, frontmatter, body, folders) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (note_id, record.title, frontmatter, body, folder_tokens(record.folder)),
+                )
+
+                # Replace the note's outgoing links
+                self._conn.execute("DELETE FROM links WHERE src_id = ?", (note_id,))
+                self._conn.executemany(
+                    "INSERT INTO links (src_id, target) VALUES (?, ?)",
+                    [(note_id, target) for target in extract_wikilinks(content)],
+                )
+
+        for record in records:
+            self._cache_add(record)
+        for path in removed:
+            self._cache_remove(path)
+
+        for listener in self._listeners:
+            listener(records, removed)
+
+    def refresh(self, force: bool = False) -> int:
+        """
+        Bring the index up to date with the vault on disk.
+
+        Args:
+            force: Refresh even if the last refresh is more recent than INDEX_REFRESH_SECONDS
+
+        Returns:
+            Number of notes that were added, changed or removed
+        """
+        with self._lock:
+            if not force and time.monotonic() - self._last_refresh < INDEX_REFRESH_SECONDS:
+                return 0
+
+            seen = set()
+            changed = []
+            for rel_path, stats in self._scan():
+                seen.add(rel_path)
+                if self._stamps.get(rel_path) != (stats.st_mtime, stats.st_size):
+                    changed.append(self._parse_note(rel_path, stats))
+            removed = [path for path in self._stamps if path not in seen]
+
+            if changed or removed:
+                self._write(changed, removed)
+
+            self._last_refresh = time.monotonic()
+            return len(changed) + len(removed)
+
+    def update_paths(self, rel_paths: List[str]) -> None:
+        """Re-index specific notes, e.g. right after the server wrote them."""
+        with self._lock:
+            changed = []
+            removed = []
+            for rel_path in rel_paths:
+                try:
+                    stats = (self.vault_path / rel_path).stat()
+                except FileNotFoundError:
+                    removed.append(rel_path)
+                    continue
+                changed.append(self._parse_note(rel_path, stats))
+            self._write(changed, removed)
+
+    @staticmethod
+    def _row_to_record(row: sqlite3.Row) -> NoteRecord:
+        return NoteRecord(
+            path=row['path'],
+            folder=row['folder'],
+            mtime=row['mtime'],
+            size=row['size'],
+            title=row['title'],
+            tags=row['tags'].split() if row['tags'] else [],
+            note_type=row['note_type'],
+        )
+
+    @staticmethod
+    def _folder_filter(folder: str) -> Tuple[str, List[Any]]:
+        """SQL condition selecting a folder and all of its subfolders."""
+        folder = folder.strip('/')
+        if not folder:
+            return "1", []
+        escaped = folder.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+        return "(folder = ? OR folder LIKE ? ESCAPE '\\')", [folder, escaped + '/%']
+
+    def list_notes(
+        self,
+        folder: str = "",
+        limit: int = 20,
+        after: Optional[Tuple[float, str]] = None
+    ) -> Tuple[List[NoteRecord], bool]:
+        """
+        Return one page of notes under a folder, newest first.
+
+        Pages are keyed on (mtime, path) and read straight off the mtime index,
+        so only `limit + 1` rows are touched no matter how large the vault is.
+
+        Args:
+            folder: Folder to list, including subfolders (empty for the whole vault)
+            limit: Page size
+            after: (mtime, path) of the last note on the previous page
+
+        Returns:
+            The notes on this page and whether more pages follow
+        """
+        condition, params = self._folder_filter(folder)
+        if after is not None:
+            condition += " AND (mtime < ? OR (mtime = ? AND path > ?))"
+            params = params + [after[0], after[0], after[1]]
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT * FROM notes WHERE {condition} ORDER BY mtime DESC, path LIMIT ?",
+                params + [limit + 1],
+            ).fetchall()
+        records = [self._row_to_record(row) for row in rows[:limit]]
+        return records, len(rows) > limit
+
+    def resolve_link(self, target: str) -> Optional[str]:
+        """
+        Resolve a normalised wikilink target to a note path, like Obsidian does:
+        an exact vault path wins, otherwise the note with that name and the
+        shortest path.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT path FROM notes WHERE path_key = ?", (target,)
+            ).fetchone()
+            if row is None:
+                row = self._conn.execute(
+                    "SELECT path FROM notes WHERE name_key = ? ORDER BY length(path), path LIMIT 1",
+                    (target,),
+                ).fetchone()
+        return row['path'] if row else None
+
+    def outgoing_links(self, rel_path: str) -> Tuple[List[str], List[str]]:
+        """
+        Return the notes a note links to.
+
+        Returns:
+            (resolved note paths, unresolved link targets)
+        """
+        with self._lock:
+            targets = [
+                row['target'] for row in self._conn.execute(
+                    "SELECT target FROM links "
+                    "WHERE src_id = (SELECT id FROM notes WHERE path = ?) ORDER BY target",
+                    (rel_path,),
+                )
+            ]
+        resolved, unresolved = [], []
+        for target in targets:
+            path = self.resolve_link(target)
+            if path is None:
+                unresolved.append(target)
+            elif path != rel_path and path not in resolved:
+                resolved.append(path)
+        return resolved, unresolved
+
+    def backlinks(self, rel_path: str) -> List[str]:
+        """Return the notes that link to a note, by vault path or by name."""
+        keys = [link_key(rel_path)]
+        # Linking by bare name only counts if that name resolves to this note
+        name_key = link_key(Path(rel_path).name)
+        if name_key != keys[0] and self.resolve_link(name_key) == rel_path:
+            keys.append(name_key)
+
+        placeholders = ', '.join('?' for _ in keys)
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT DISTINCT notes.path FROM links JOIN notes ON notes.id = links.src_id "
+                f"WHERE links.target IN ({placeholders}) ORDER BY notes.path",
+                keys,
+            ).fetchall()
+        return [row['path'] for row in rows if row['path'] != rel_path]
+
+    def get_records(self, rel_paths: List[str]) -> List[NoteRecord]:
+        """Fetch the index records for specific notes, in the order given."""
+        if not rel_paths:
+            return []
+        placeholders = ', '.join('?' for _ in rel_paths)
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT * FROM notes WHERE path IN ({placeholders})", rel_paths
+            ).fetchall()
+        by_path = {row['path']: self._row_to_record(row) for row in rows}
+        return [by_path[path] for path in rel_paths if path in by_path]
+
+    def count_notes(self, folder: str = "") -> int:
+        """Count the notes under a folder (including subfolders) from the in-memory cache."""
+        folder = folder.strip('/')
+        with self._lock:
+            if not folder:
+                return len(self._stamps)
+            prefix = folder + '/'
+            return sum(
+                count for name, count in self._folder_counts.items()
+                if name == folder or name.startswith(prefix)
+            )
+
+    def find_similar(self, name: str, limit: int = 5) -> List[str]:
+        """Return paths of the notes whose names best match `name`, tolerating typos."""
+        with self._lock:
+            return [path for path, _ in self._names.search(name, limit)]
+
+    def search(self, query: str, limit: int = 10, folder: str = "") -> List[Tuple[NoteRecord, str]]:
+        """
+        Rank notes against a free-text query with BM25 over titles, frontmatter and bodies.
+
+        Notes matching every word are preferred; if there are none, notes matching
+        any word are returned instead. Scoring is bounded: when more than
+        SEARCH_MAX_CANDIDATES notes match, only the most recently created ones
+        are ranked, and snippets are built for the returned notes alone.
+
+        Returns:
+            List of (record, highlighted snippet) pairs, best match first
+        """
+        scope = folder_tokens(folder).rpartition(' ')[2]
+        rows = []
+        for match_all in (True, False):
+            expression = build_search_expression(query, match_all)
+            if not expression:
+                return []
+            # The folders column only narrows the candidates; it is never
+            # searched for the user's words, scored or used for snippets
+            expression = f"{{title frontmatter body}} : ({expression})"
+            candidates = f'{expression} AND folders : "{scope}"' if scope else expression
+            with self._lock:
+                rows = self._conn.execute(
+                    "WITH candidates AS ("
+                    "  SELECT rowid AS id, bm25(notes_fts, 5.0, 2.0, 1.0, 0.0) AS score "
+                    "  FROM notes_fts WHERE notes_fts MATCH ? ORDER BY rowid DESC LIMIT ?"
+                    "), best AS (SELECT id, score FROM candidates ORDER BY score LIMIT ?) "
+                    "SELECT notes.*, snippet(notes_fts, -1, '**', '**', '…', 16) AS snippet "
+                    "FROM best "
+                    "JOIN notes_fts ON notes_fts.rowid = best.id "
+                    "JOIN notes ON notes.id = best.id "
+                    "WHERE notes_fts MATCH ? ORDER BY best.score",
+                    [candidates, SEARCH_MAX_CANDIDATES, limit, expression],
+                ).fetchall()
+            if rows:
+                break
+        return [(self._row_to_record(row), row['snippet']) for row in rows]
+
+    def stats(self) -> Tuple[int, int, Dict[str, int]]:
+        """Return (total notes, total size in bytes, note count per folder) from memory."""
+        with self._lock:
+            folder_stats = {
+                (folder or 'Root'): count for folder, count in self._folder_counts.items()
+            }
+            return len(self._stamps), self._total_size, folder_stats
+
+    def query(
+        self,
+        tags: List[str],
+        note_type: str = "",
+        modified_after: Optional[float] = None,
+        match_all: bool = True,
+        folder: str = ""
+    ) -> List[Tuple[str, float]]:
+        """Find notes by tags, type, modification time and folder from the in-memory tag index."""
+        with self._lock:
+            results = self._tags.query(tags, note_type, modified_after, match_all)
+        folder = folder.strip('/')
+        if folder:
+            results = [item for item in results if item[0].startswith(folder + '/')]
+        return results
+
+    def tag_counts(self) -> Counter:
+        """Number of notes carrying each tag."""
+        with self._lock:
+            return self._tags.tag_counts()
+
+    def title_of(self, rel_path: str) -> Optional[str]:
+        """Return the cached title of a note, or None if it isn't indexed."""
+        return self._titles.get(rel_path)
+
+class VaultEventHandler(FileSystemEventHandler):
+    """Forwards watchdog file system events for markdown notes to a VaultWatcher."""
+
+    def __init__(self, watcher: "VaultWatcher"):
+        super().__init__()
+        self.watcher = watcher
+
+    def on_any_event(self, event) -> None:
+        if event.event_type not in ('created', 'modified', 'deleted', 'moved'):
+            return
+        paths = [event.src_path]
+        if event.event_type == 'moved':
+            paths.append(event.dest_path)
+        if event.is_directory:
+            # A moved or deleted folder affects every note inside it
+            if event.event_type in ('moved', 'deleted'):
+                self.watcher.request_rescan()
+            return
+        for path in paths:
+            self.watcher.notify(os.fsdecode(path))
+
+class VaultWatcher:
+    """
+    Background watcher that keeps a VaultIndex hot while the server runs.
+
+    Uses watchdog (inotify, FSEvents, ...) when it is installed and falls back to
+    periodic mtime polling otherwise. Events are debounced: changes are collected
+    until the vault has been quiet for WATCH_DEBOUNCE_SECONDS (or at most
+    WATCH_MAX_DELAY_SECONDS), then applied to the index in a single batch, so a
+    burst such as a `git pull` of the vault triggers one re-index.
+    """
+
+    def __init__(self, index: VaultIndex):
+        self.index = index
+        self._condition = threading.Condition()
+        self._pending: set = set()
+        self._rescan = False
+        self._first_event = 0.0
+        self._last_event = 0.0
+        self._observer = None
+        self._thread = threading.Thread(target=self._run, name="vault-watcher", daemon=True)
+
+    @property
+    def mode(self) -> str:
+        """'native' when receiving file system events, 'polling' otherwise."""
+        return 'native' if self._observer is not None else 'polling'
+
+    def start(self) -> None:
+        if Observer is not None and self.index.vault_path.is_dir():
+            try:
+                observer = Observer()
+                observer.schedule(VaultEventHandler(self), str(self.index.vault_path), recursive=True)
+                observer.daemon = True
+                observer.start()
+                self._observer = observer
+            except OSError:
+                # e.g. the inotify watch limit was reached; polling still works
+                self._observer = None
+        self._thread.start()
+
+    def notify(self, full_path: str) -> None:
+        """Queue a changed file for re-indexing."""
+        try:
+            rel = Path(full_path).relative_to(self.index.vault_path)
+        except ValueError:
+            return
+        if not rel.name.endswith('.md') or any(part.startswith('.') for part in rel.parts):
+            return
+        self._touch(lambda: self._pending.add(rel.as_posix()))
+
+    def request_rescan(self) -> None:
+        """Queue a full incremental refresh, e.g. after a folder was moved."""
+        def flag():
+            self._rescan = True
+        self._touch(flag)
+
+    def _touch(self, update: Callable[[], None]) -> None:
+        with self._condition:
+            now = time.monotonic()
+            if not self._pending and not self._rescan:
+                self._first_event = now
+            self._last_event = now
+            update()
+            self._condition.notify()
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                # Without native events, wake up periodically and poll mtimes instead
+                if not self._pending and not self._rescan:
+                    timeout = None if self._observer is not None else WATCH_POLL_SECONDS
+                    if not self._condition.wait(timeout) and self._observer is None:
+                        self._rescan = True
+                        self._first_event = self._last_event = 0.0
+
+                # Debounce: wait for a quiet period, but never longer than the max delay
+                while True:
+                    now = time.monotonic()
+                    quiet_for = now - self._last_event
+                    waited = now - self._first_event
+                    if quiet_for >= WATCH_DEBOUNCE_SECONDS or waited >= WATCH_MAX_DELAY_SECONDS:
+                        break
+                    self._condition.wait(min(WATCH_DEBOUNCE_SECONDS - quiet_for,
+                                             WATCH_MAX_DELAY_SECONDS - waited))
+
+                batch = sorted(self._pending)
+                rescan = self._rescan
+                self._pending = set()
+                self._rescan = False
+
+            try:
+                if rescan:
+                    self.index.refresh(force=True)
+                elif batch:
+                    self.index.update_paths(batch)
+            except Exception as e:
+                # Never let a bad file kill the watcher; the next event retries
+                print(f"⚠️ Vault watcher failed to update the index: {e}", file=sys.stderr)
+
+class Heading(NamedTuple):
+    """A markdown heading and the byte range of the section it starts."""
+    level: int
+    title: str
+    start: int
+    end: int
+
+def scan_headings(data: Any) -> List[Heading]:
+    """
+    Find the markdown headings in a note's raw bytes.
+
+    Works directly on bytes (or an mmap) with `find`, so building the table
+    never decodes the note. Headings inside fenced code blocks are ignored.
+
+    Args:
+        data: The note's bytes or an mmap of the note file
+
+    Returns:
+        Headings in document order; each section ends where the next heading
+        of the same or a higher level starts
+    """
+    size = len(data)
+    found = []
+    in_fence = False
+    pos = 0
+    while pos < size:
+        line_end = data.find(b'\n', pos)
+        if line_end == -1:
+            line_end = size
+        first = data[pos:pos + 1]
+        if first in (b'`', b'~') and data[pos:pos + 3] in (b'```', b'~~~'):
+            in_fence = not in_fence
+        elif first == b'#' and not in_fence:
+            line = data[pos:line_end].rstrip(b'\r')
+            hashes = len(line) - len(line.lstrip(b'#'))
+            if hashes <= 6 and line[hashes:hashes + 1] == b' ':
+                title = line[hashes:].strip().decode('utf-8', errors='replace')
+                found.append((hashes, title, pos))
+        pos = line_end + 1
+
+    headings = []
+    for i, (level, title, start) in enumerate(found):
+        end = size
+        for next_level, _, next_start in found[i + 1:]:
+            if next_level <= level:
+                end = next_start
+                break
+        headings.append(Heading(level, title, start, end))
+    return headings
+
+class HeadingCache:
+    """
+    LRU cache of per-note heading offset tables, invalidated by mtime and size.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._entries: "OrderedDict[str, Tuple[Tuple[float, int], List[Heading]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, full_path: Path, stats: os.stat_result) -> List[Heading]:
+        key = str(full_path)
+        stamp = (stats.st_mtime, stats.st_size)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == stamp:
+                self._entries.move_to_end(key)
+                return entry[1]
+
+        if stats.st_size == 0:
+            headings = []
+        else:
+            with open(full_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                headings = scan_headings(mm)
+
+        with self._lock:
+            self._entries[key] = (stamp, headings)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+        return headings
+
+_heading_cache = HeadingCache(HEADING_CACHE_SIZE)
+
+def read_byte_range(full_path: Path, size: int, start: int, end: int) -> Tuple[str, int, int]:
+    """
+    Read and decode bytes [start, end) of a file through mmap.
+
+    The range is widened or narrowed to UTF-8 character boundaries so a
+    multi-byte character is never cut in half. A range too short to hold the
+    character at `start` is widened to cover it, so the returned range is never
+    empty unless the requested one was.
+
+    Returns:
+        (decoded text, actual start, actual end)
+    """
+    start = max(0, min(start, size))
+    end = max(start, min(end, size))
+    if start == end:
+        return '', start, end
+
+    with open(full_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        # UTF-8 continuation bytes look like 0b10xxxxxx
+        while start > 0 and mm[start] & 0xC0 == 0x80:
+            start -= 1
+        requested_end = end
+        while end < size and mm[end] & 0xC0 == 0x80:
+            end -= 1
+        if end <= start:
+            end = requested_end
+            while end < size and mm[end] & 0xC0 == 0x80:
+                end += 1
+        return mm[start:end].decode('utf-8', errors='replace'), start, end
+
+def resolve_note_path(note_name: str) -> Path:
+    """Turn a vault-relative note name into a full path, adding `.md` if needed."""
+    full_path = get_vault_path() / note_name
+    if not str(full_path).endswith('.md'):
+        full_path = Path(str(full_path) + '.md')
+    return full_path
+
+def note_not_found_message(note_name: str) -> str:
+    """Build the 'note not found' reply, with fuzzy suggestions when there are any."""
+    search_term = note_name[:-3] if note_name.endswith('.md') else note_name
+    similar_notes = get_vault_index().find_similar(search_term, limit=5)
+
+    if similar_notes:
+        suggestions = "\n".join([f"  • {note}" for note in similar_notes])
+        return f"""❌ Note not found: '{note_name}'
+
+Did you mean one of these?
+{suggestions}
+
+💡 Tip: Use the exact path including folders, e.g., "Daily Notes/2024-01-15.md"
+"""
+    return f"""❌ Note not found: '{note_name}'
+
+The note doesn't exist in your vault at:
+{get_vault_path()}
+
+💡 Tip: Make sure to include the folder path if the note is in a subfolder.
+Example: "Projects/My Project.md" or "Daily Notes/2024-01-15.md"
+"""
+
+def resolve_note_name(note_name: str) -> Optional[str]:
+    """
+    Find the vault-relative path of a note given either its path or its
+    wikilink-style name (e.g. "My Note" for "Projects/My Note.md").
+    """
+    full_path = resolve_note_path(note_name)
+    if full_path.exists():
+        return full_path.relative_to(get_vault_path()).as_posix()
+    return get_vault_index().resolve_link(link_key(note_name))
+
+# Lock files live next to the index, one directory per vault, so every server
+# process writing to the same vault coordinates through the same files
+_path_locks = PathLockManager(
+    Path(INDEX_DIR) / f"locks-{hashlib.sha1(str(Path(DEFAULT_VAULT_PATH).resolve()).encode('utf-8')).hexdigest()[:12]}",
+    PATH_LOCK_STRIPES,
+)
+
+_vault_index: Optional[VaultIndex] = None
+_vault_watcher: Optional[VaultWatcher] = None
+_vault_index_lock = threading.Lock()
+
+def get_vault_index() -> VaultIndex:
+    """
+    Get the note index for the configured vault.
+
+    The first call brings the index up to date and starts the background
+    watcher; from then on the watcher keeps it current. If the watcher is
+    disabled, the index is refreshed here whenever a refresh is due.
+
+    Returns:
+        The shared VaultIndex instance
+    """
+    global _vault_index, _vault_watcher
+    with _vault_index_lock:
+        if _vault_index is None:
+            index = VaultIndex(get_vault_path(), Path(INDEX_DIR))
+            index.refresh(force=True)
+            if WATCH_ENABLED:
+                _vault_watcher = VaultWatcher(index)
+                _vault_watcher.start()
+            _vault_index = index
+            return index
+
+    if _vault_watcher is None:
+        _vault_index.refresh()
+    return _vault_index
+
 @mcp.tool()
-def read_note(note_name: str) -> str:
+def read_note(note_name: str, offset: int = 0, length: int = 0) -> str:
     """
     Read a note from your Obsidian vault.
     
     This tool retrieves the content of any note in your vault, including
-    its metadata and markdown content.
+    its metadata and markdown content. For very large notes, pass `offset`
+    and `length` to read only a byte range, or use `read_note_section`.
     
     Args:
         note_name: Name of the note within the vault (e.g., "Daily Notes/2024-01-15.md")
+        offset: Byte offset to start reading from (default: 0)
+        length: Number of bytes to read (default: 0 = to the end of the note)
         
     Returns:
-        The complete content of the note including frontmatter and body
+        The content of the note (or of the requested range) including frontmatter and body
         
     Example:
         read_note("Projects/MCP Integration.md") - reads a project note
         read_note("Daily Notes/2024-01-15.md") - reads a daily note
+        read_note("Reference/Big Manual.md", offset=0, length=20000) - reads the first 20 KB
     """
     try:
-        vault_path = get_vault_path()
+        if offset < 0 or length < 0:
+            return "❌ offset and length must not be negative"
         
         # Construct the full path to the note
-        full_path = vault_path / note_name
-        
-        # Add .md extension if not present
-        if not str(full_path).endswith('.md'):
-            full_path = Path(str(full_path) + '.md')
+        full_path = resolve_note_path(note_name)
         
         # Check if the note exists
         if not full_path.exists():
-            # Try to find similar notes for helpful suggestions
-            similar_notes = []
-            search_term = Path(note_name).stem.lower()
-            
-            for md_file in vault_path.rglob("*.md"):
-                if search_term in md_file.stem.lower():
-                    relative_path = md_file.relative_to(vault_path)
-                    similar_notes.append(str(relative_path))
-            
-            if similar_notes:
-                suggestions = "\n".join([f"  • {note}" for note in similar_notes[:5]])
-                return f"""❌ Note not found: '{note_name}'
-
-Did you mean one of these?
-{suggestions}
-
-💡 Tip: Use the exact path including folders, e.g., "Daily Notes/2024-01-15.md"
-"""
-            else:
-                return f"""❌ Note not found: '{note_name}'
-
-The note doesn't exist in your vault at:
-{vault_path}
-
-💡 Tip: Make sure to include the folder path if the note is in a subfolder.
-Example: "Projects/My Project.md" or "Daily Notes/2024-01-15.md"
-"""
-        
-        # Read the note content
-        content = full_path.read_text(encoding='utf-8')
+            return note_not_found_message(note_name)
         
         # Get file stats for additional context
         stats = full_path.stat()
         modified_time = datetime.fromtimestamp(stats.st_mtime).strftime('%Y-%m-%d %H:%M:%S')
         file_size = stats.st_size
         
+        # Read the note content, or only the requested byte range
+        range_line = ""
+        if offset or length:
+            end = offset + length if length else file_size
+            content, start, end = read_byte_range(full_path, file_size, offset, end)
+            range_line = f"**Range**: bytes {start}-{end} of {file_size}"
+            if end < file_size:
+                range_line += f" (continue with offset={end})"
+            range_line += "\n"
+        else:
+            content = full_path.read_text(encoding='utf-8')
+        
         # Format the response with metadata
         response = f"""📝 **Note: {note_name}**
 
 **Last Modified**: {modified_time}
 **Size**: {file_size} bytes
-**Location**: {full_path}
+{range_line}**Location**: {full_path}
 
 ---
 
@@ -198,7 +1566,76 @@ Example: "Projects/My Project.md" or "Daily Notes/2024-01-15.md"
         ) from e
 
 @mcp.tool()
-def create_note(
+def read_note_section(note_name: str, heading: str = "") -> str:
+    """
+    Read a single section of a note, identified by its heading.
+    
+    Only the bytes of the requested section are read, so this is the cheap way
+    to pull one part out of a large reference note. The section includes its
+    subsections. Call it without a heading to get the note's outline.
+    
+    Args:
+        note_name: Name of the note within the vault (e.g., "Reference/Big Manual.md")
+        heading: Heading text to read, without the leading #'s (case-insensitive)
+        
+    Returns:
+        The section's markdown, or the note's outline if no heading is given
+        
+    Example:
+        read_note_section("Projects/MCP Integration.md", "Tasks")
+        read_note_section("Reference/Big Manual.md") - lists the headings
+    """
+    try:
+        full_path = resolve_note_path(note_name)
+        if not full_path.exists():
+            return note_not_found_message(note_name)
+        
+        stats = full_path.stat()
+        headings = _heading_cache.get(full_path, stats)
+        
+        wanted = heading.strip().lstrip('#').strip().lower()
+        match = None
+        if wanted:
+            match = next((h for h in headings if h.title.lower() == wanted), None)
+            if match is None:
+                match = next((h for h in headings if wanted in h.title.lower()), None)
+        
+        if match is None:
+            if not headings:
+                return f"📄 '{note_name}' has no headings. Use read_note to read it."
+            outline = "\n".join(
+                f"{'  ' * (h.level - 1)}• {h.title} ({h.end - h.start} bytes)" for h in headings
+            )
+            prefix = f"❌ Heading not found: '{heading}'\n\n" if wanted else ""
+            return f"""{prefix}📑 **Outline of {note_name}**
+
+{outline}
+
+💡 Tip: Read a section with: read_note_section("{note_name}", "{headings[0].title}")
+"""
+        
+        content, start, end = read_byte_range(full_path, stats.st_size, match.start, match.end)
+        return f"""📝 **Note: {note_name}** › {match.title}
+
+**Section**: bytes {start}-{end} of {stats.st_size}
+**Location**: {full_path}
+
+---
+
+{content}"""
+        
+    except PermissionError:
+        return f"❌ Permission denied: Cannot read '{note_name}'. Please check file permissions."
+    except Exception as e:
+        raise McpError(
+            ErrorData(
+                code=INTERNAL_ERROR,
+                message=f"Failed to read section '{heading}' of note '{note_name}': {str(e)}"
+            )
+        ) from e
+
+@mcp.tool()
+async def create_note(
     title: str,
     content: str,
     folder: str = "",
@@ -230,6 +1667,18 @@ def create_note(
             note_type="project"
         )
     """
+    # The write runs in a worker thread so that concurrent clients can create
+    # notes in parallel; PathLockManager keeps writes to the same note apart
+    return await asyncio.to_thread(_create_note, title, content, folder, tags, note_type)
+
+def _create_note(
+    title: str,
+    content: str,
+    folder: str = "",
+    tags: str = "",
+    note_type: str = "general"
+) -> str:
+    """Synchronous implementation of create_note."""
     try:
         vault_path = get_vault_path()
         
@@ -245,117 +1694,42 @@ def create_note(
         
         # Full path for the new note
         note_path = target_folder / filename
+        relative_path = note_path.relative_to(vault_path)
         
-        # Check if note already exists
-        if note_path.exists():
-            return f"""⚠️ Note already exists: '{note_path.relative_to(vault_path)}'
+        already_exists = f"""⚠️ Note already exists: '{relative_path}'
 
 The note '{title}' already exists in {folder if folder else 'root folder'}.
 
 Options:
 1. Choose a different title
-2. Read the existing note with: read_note("{note_path.relative_to(vault_path)}")
+2. Read the existing note with: read_note("{relative_path}")
 3. Create the note in a different folder
 """
         
+        # Check if note already exists
+        if note_path.exists():
+            return already_exists
+        
         # Process tags
         tag_list = [tag.strip() for tag in tags.split(',')] if tags else []
         
         # Validate note type
-        valid_types = ['general', 'idea', 'project', 'daily', 'reference', 'meeting']
-        if note_type not in valid_types:
+        if note_type not in VALID_NOTE_TYPES:
             note_type = 'general'
         
-        # Generate the note content with metadata
-        frontmatter = format_note_metadata(title, tag_list, note_type)
-        
-        # Add structure based on note type
-        structured_content = frontmatter + f"# {title}\n\n"
+        # Generate the note content with metadata and type-specific structure
+        structured_content = build_note_content(title, content, tag_list, note_type)
         
-        # Add type-specific template structure
-        if note_type == 'project':
-            structured_content += """## Overview
-
-
-## Goals
-- [ ] 
-
-## Tasks
-- [ ] 
-
-## Resources
-
-
-## Notes
-
-"""
-        elif note_type == 'meeting':
-            structured_content += f"""## Meeting Details
-**Date**: {datetime.now().strftime('%Y-%m-%d')}
-**Attendees**: 
-**Purpose**: 
-
-## Agenda
-
-
-## Discussion
-
-
-## Action Items
-- [ ] 
-
-## Next Steps
-
-
-"""
-        elif note_type == 'daily':
-            structured_content += f"""## {datetime.now().strftime('%A, %B %d, %Y')}
-
-### Morning Thoughts
-
-
-### Today's Tasks
-- [ ] 
-
-### Notes
-
-
-### Reflection
-
-
-"""
-        elif note_type == 'idea':
-            structured_content += """## The Idea
-
-
-## Why This Matters
-
-
-## Implementation Thoughts
-
-
-## Next Steps
-- [ ] Research
-- [ ] Prototype
-- [ ] Validate
-
-"""
-        
-        # Add the user's content
-        structured_content += content
-        
-        # Add footer with creation context
-        structured_content += f"""
-
----
-*Created via MCP Server on {datetime.now().strftime('%Y-%m-%d at %H:%M:%S')}*
-"""
-        
-        # Write the note to disk
-        note_path.write_text(structured_content, encoding='utf-8')
-        
-        # Generate success response
-        relative_path = note_path.relative_to(vault_path)
+        # Write the note to disk. The per-path lock and exclusive create make
+        # sure concurrent clients creating the same note can't overwrite it
+        try:
+            with _path_locks.lock(relative_path.as_posix()):
+                exclusive_write_text(note_path, structured_content)
+        except FileExistsError:
+            return already_exists
+
+        # Make the new note visible to the index right away
+        get_vault_index().update_paths([relative_path.as_posix()])
         response = f"""✅ **Note Created Successfully!**
 
 📝 **Title**: {title}
@@ -385,17 +1759,139 @@ You can now:
             )
         ) from e
 
+class NoteSpec(BaseModel):
+    """A single note to create with create_notes_batch."""
+    title: str = Field(description="The title of the note (will be used as filename)")
+    content: str = Field(default="", description="The main content of the note (markdown supported)")
+    folder: str = Field(default="", description="Folder to place the note in")
+    tags: str = Field(default="", description="Comma-separated tags for the note")
+    note_type: str = Field(default="general", description="One of: general, idea, project, daily, reference, meeting")
+
+@mcp.tool()
+async def create_notes_batch(notes: List[NoteSpec]) -> str:
+    """
+    Create many notes in your Obsidian vault in a single request.
+    
+    Each note gets the same frontmatter and templates as `create_note`. Notes are
+    grouped per folder and every file is written atomically, so a partially
+    written note is never visible. Notes that already exist are skipped.
+    
+    Args:
+        notes: List of notes, each with title, content, folder, tags and note_type
+        
+    Returns:
+        A compact summary of created, skipped and failed notes
+        
+    Example:
+        create_notes_batch([
+            {"title": "Paper A", "content": "...", "folder": "Papers", "tags": "ml"},
+            {"title": "Paper B", "content": "...", "folder": "Papers", "tags": "ml,nlp"}
+        ])
+    """
+    return await asyncio.to_thread(_create_notes_batch, notes)
+
+def _create_notes_batch(notes: List[NoteSpec]) -> str:
+    """Synchronous implementation of create_notes_batch."""
+    try:
+        if not notes:
+            return "❌ No notes to create."
+        if len(notes) > CREATE_BATCH_MAX_NOTES:
+            return f"❌ Too many notes in one batch: {len(notes)} (max: {CREATE_BATCH_MAX_NOTES}). Split it into smaller batches."
+        
+        vault_path = get_vault_path()
+        
+        # Group the notes per folder so each folder is created and listed once
+        by_folder: Dict[str, List[NoteSpec]] = {}
+        for spec in notes:
+            by_folder.setdefault(spec.folder.strip('/'), []).append(spec)
+        
+        created: List[str] = []
+        skipped: List[str] = []
+        failed: List[str] = []
+        created_per_folder: Counter = Counter()
+        
+        for folder, specs in by_folder.items():
+            target_folder = vault_path / folder if folder else vault_path
+            try:
+                target_folder.mkdir(parents=True, exist_ok=True)
+                existing = {entry.name for entry in os.scandir(target_folder)}
+            except OSError as e:
+                failed.extend(f"{note_relative_path(folder, spec.title)}: {e}" for spec in specs)
+                continue
+            
+            for spec in specs:
+                filename = sanitize_filename(spec.title)
+                relative_path = note_relative_path(folder, spec.title)
+                if filename in existing:
+                    skipped.append(relative_path)
+                    continue
+                
+                tag_list = [tag.strip() for tag in spec.tags.split(',') if tag.strip()]
+                note_type = spec.note_type if spec.note_type in VALID_NOTE_TYPES else 'general'
+                try:
+                    with _path_locks.lock(relative_path):
+                        exclusive_write_text(
+                            target_folder / filename,
+                            build_note_content(spec.title, spec.content, tag_list, note_type)
+                        )
+                except FileExistsError:
+                    # Created by another client since the folder was listed
+                    existing.add(filename)
+                    skipped.append(relative_path)
+                    continue
+                except OSError as e:
+                    failed.append(f"{relative_path}: {e}")
+                    continue
+                
+                # Titles that sanitize to the same filename count as duplicates
+                existing.add(filename)
+                created.append(relative_path)
+                created_per_folder[folder or 'Root'] += 1
+        
+        # Index everything that was written in one transaction
+        if created:
+            get_vault_index().update_paths(created)
+        
+        response = f"✅ **Created {len(created)} of {len(notes)} notes**\n"
+        for folder, count in sorted(created_per_folder.items()):
+            response += f"  • {folder}: {count} notes\n"
+        if skipped:
+            response += f"\n⚠️ Skipped {len(skipped)} existing notes: {', '.join(skipped[:10])}"
+            response += f" (+{len(skipped) - 10} more)\n" if len(skipped) > 10 else "\n"
+        if failed:
+            response += f"\n❌ Failed {len(failed)} notes:\n"
+            response += "".join(f"  • {failure}\n" for failure in failed[:10])
+        
+        return response
+        
+    except Exception as e:
+        raise McpError(
+            ErrorData(
+                code=INTERNAL_ERROR,
+                message=f"Failed to create notes: {str(e)}"
+            )
+        ) from e
+
 @mcp.tool()
-def list_notes(folder: str = "", limit: int = 20) -> str:
+def list_notes(folder: str = "", limit: int = 20, cursor: str = "", format: str = "markdown") -> str:
     """
     List notes in your Obsidian vault, optionally filtered by folder.
     
+    Notes are returned newest first, one page at a time. When more notes are
+    available the response includes a cursor; pass it back to get the next page.
+    
     Args:
         folder: Specific folder to list notes from (empty for all notes)
-        limit: Maximum number of notes to return (default: 20, max: 50)
+        limit: Number of notes per page (default: 20, max: 200)
+        cursor: Cursor from a previous call to continue where it left off
+        format: "markdown" for a readable list or "json" for structured output
         
     Returns:
         A formatted list of notes with their paths and modification times
+        
+    Example:
+        list_notes("Projects", limit=50) - first page of project notes
+        list_notes("Projects", limit=50, cursor="...") - the next page
     """
     try:
         vault_path = get_vault_path()
@@ -408,64 +1904,60 @@ def list_notes(folder: str = "", limit: int = 20) -> str:
         else:
             search_path = vault_path
         
-        # Limit the number of results
-        limit = min(limit, 50)
+        if format not in ('markdown', 'json'):
+            return f"❌ Unknown format '{format}'. Use 'markdown' or 'json'."
+        
+        # Clamp the page size
+        limit = max(1, min(limit, LIST_NOTES_MAX_PAGE))
+        
+        try:
+            after = decode_cursor(cursor) if cursor else None
+        except ValueError:
+            return f"❌ Invalid cursor: '{cursor}'. Start again without a cursor."
         
-        # Find all markdown files
-        notes = []
-        for md_file in search_path.rglob("*.md"):
-            relative_path = md_file.relative_to(vault_path)
-            modified_time = datetime.fromtimestamp(md_file.stat().st_mtime)
-            notes.append((relative_path, modified_time, md_file))
+        # Answer from the note index instead of walking and reading every file
+        index = get_vault_index()
+        total = index.count_notes(folder)
+        notes, has_more = index.list_notes(folder, limit, after)
+        next_cursor = encode_cursor(notes[-1].mtime, notes[-1].path) if has_more else None
         
-        # Sort by modification time (newest first)
-        notes.sort(key=lambda x: x[1], reverse=True)
+        if format == 'json':
+            return json.dumps({
+                "folder": folder,
+                "total": total,
+                "notes": [
+                    {
+                        "path": note.path,
+                        "title": note.title,
+                        "modified": datetime.fromtimestamp(note.mtime).isoformat(timespec='seconds'),
+                        "size": note.size,
+                        "type": note.note_type,
+                        "tags": note.tags,
+                    }
+                    for note in notes
+                ],
+                "next_cursor": next_cursor,
+            }, ensure_ascii=False, separators=(',', ':'))
         
         # Format response
         if not notes:
             return f"📭 No notes found in {'folder: ' + folder if folder else 'vault'}"
         
-        response = f"📚 **Notes in {'folder: ' + folder if folder else 'your vault'}**\n\n"
-        response += f"Found {len(notes)} notes (showing {min(len(notes), limit)})\n\n"
+        lines = [
+            f"📚 **Notes in {'folder: ' + folder if folder else 'your vault'}**\n",
+            f"Found {total} notes (showing {len(notes)})\n",
+        ]
         
-        for i, (rel_path, mod_time, full_path) in enumerate(notes[:limit], 1):
-            # Try to extract title from frontmatter or first heading
-            try:
-                content = full_path.read_text(encoding='utf-8')
-                lines = content.split('\n')
-                title = None
-                
-                # Look for title in frontmatter
-                if lines[0] == '---':
-                    for line in lines[1:]:
-                        if line == '---':
-                            break
-                        if line.startswith('title:'):
-                            title = line.replace('title:', '').strip()
-                            break
-                
-                # If no title in frontmatter, use first # heading
-                if not title:
-                    for line in lines:
-                        if line.startswith('# '):
-                            title = line.replace('# ', '').strip()
-                            break
-                
-                # Default to filename without extension
-                if not title:
-                    title = full_path.stem
-                    
-            except:
-                title = full_path.stem
-            
-            response += f"{i}. **{title}**\n"
-            response += f"   📄 Path: `{rel_path}`\n"
-            response += f"   🕒 Modified: {mod_time.strftime('%Y-%m-%d %H:%M')}\n\n"
+        for i, note in enumerate(notes, 1):
+            mod_time = datetime.fromtimestamp(note.mtime)
+            lines.append(f"{i}. **{note.title}**")
+            lines.append(f"   📄 Path: `{note.path}`")
+            lines.append(f"   🕒 Modified: {mod_time.strftime('%Y-%m-%d %H:%M')}\n")
         
-        if len(notes) > limit:
-            response += f"\n*Showing {limit} of {len(notes)} notes. Increase limit or specify a folder to see more.*"
+        if next_cursor:
+            lines.append(f"*More notes available. Next page: list_notes(folder=\"{folder}\", limit={limit}, cursor=\"{next_cursor}\")*")
         
-        return response
+        return "\n".join(lines)
         
     except Exception as e:
         raise McpError(
@@ -475,6 +1967,279 @@ def list_notes(folder: str = "", limit: int = 20) -> str:
             )
         ) from e
 
+@mcp.tool()
+def search_notes(query: str, limit: int = 10, folder: str = "") -> str:
+    """
+    Full-text search across your Obsidian vault.
+    
+    Searches note titles, frontmatter and bodies, ranks the matches by relevance
+    and returns a short highlighted snippet for each one instead of the whole note.
+    
+    Args:
+        query: Words to search for (e.g., "agent memory")
+        limit: Maximum number of results to return (default: 10, max: 50)
+        folder: Only search notes inside this folder (empty for the whole vault)
+        
+    Returns:
+        A ranked list of matching notes with snippets
+        
+    Example:
+        search_notes("multiagent debate") - finds notes about multiagent debate
+        search_notes("tasks", folder="Projects") - searches only project notes
+    """
+    try:
+        if not query.strip():
+            return "❌ Please provide something to search for."
+        
+        limit = max(1, min(limit, 50))
+        results = get_vault_index().search(query, limit, folder)
+        
+        where = f"folder: {folder}" if folder else "your vault"
+        if not results:
+            return f"🔍 No notes matching '{query}' in {where}"
+        
+        response = f"🔍 **Search results for '{query}' in {where}**\n\n"
+        for i, (note, snippet) in enumerate(results, 1):
+            snippet = ' '.join(snippet.split())
+            response += f"{i}. **{note.title}**\n"
+            response += f"   📄 Path: `{note.path}`\n"
+            response += f"   > {snippet}\n\n"
+        
+        response += f"*Read a full note with: read_note(\"{results[0][0].path}\")*"
+        return response
+        
+    except Exception as e:
+        raise McpError(
+            ErrorData(
+                code=INTERNAL_ERROR,
+                message=f"Failed to search notes for '{query}': {str(e)}"
+            )
+        ) from e
+
+@mcp.tool()
+def query_notes(
+    tags: str = "",
+    note_type: str = "",
+    modified_after: str = "",
+    match: str = "all",
+    folder: str = "",
+    limit: int = 20,
+    format: str = "markdown"
+) -> str:
+    """
+    Find notes by their frontmatter tags and type, and by modification date.
+    
+    Queries are answered from the tag index, so they stay fast on large vaults.
+    
+    Args:
+        tags: Comma-separated tags to filter on (e.g., "mcp,agents")
+        note_type: Only notes of this type (e.g., "project", "idea"; empty for any)
+        modified_after: Only notes modified after this date (YYYY-MM-DD or ISO datetime)
+        match: "all" to require every tag, "any" to accept notes with at least one
+        folder: Only notes inside this folder (empty for the whole vault)
+        limit: Maximum number of notes to return (default: 20, max: 200)
+        format: "markdown" for a readable list or "json" for structured output
+        
+    Returns:
+        The matching notes, newest first
+        
+    Example:
+        query_notes(tags="mcp,agents", note_type="project")
+        query_notes(modified_after="2024-01-01", format="json")
+    """
+    try:
+        if match not in ('all', 'any'):
+            return f"❌ Unknown match mode '{match}'. Use 'all' or 'any'."
+        if format not in ('markdown', 'json'):
+            return f"❌ Unknown format '{format}'. Use 'markdown' or 'json'."
+        
+        since = None
+        if modified_after:
+            try:
+                since = datetime.fromisoformat(modified_after).timestamp()
+            except ValueError:
+                return f"❌ Invalid date '{modified_after}'. Use YYYY-MM-DD or an ISO datetime."
+        
+        tag_list = normalize_tags(tags)
+        limit = max(1, min(limit, LIST_NOTES_MAX_PAGE))
+        
+        matches = get_vault_index().query(tag_list, note_type.strip(), since, match == 'all', folder)
+        notes = get_vault_index().get_records([path for path, _ in matches[:limit]])
+        
+        if format == 'json':
+            return json.dumps({
+                "total": len(matches),
+                "notes": [
+                    {
+                        "path": note.path,
+                        "title": note.title,
+                        "modified": datetime.fromtimestamp(note.mtime).isoformat(timespec='seconds'),
+                        "type": note.note_type,
+                        "tags": note.tags,
+                    }
+                    for note in notes
+                ],
+            }, ensure_ascii=False, separators=(',', ':'))
+        
+        filters = []
+        if tag_list:
+            filters.append((' + ' if match == 'all' else ' or ').join(f"#{tag}" for tag in tag_list))
+        if note_type:
+            filters.append(f"type: {note_type}")
+        if modified_after:
+            filters.append(f"modified after {modified_after}")
+        if folder:
+            filters.append(f"folder: {folder}")
+        description = ', '.join(filters) if filters else 'all notes'
+        
+        if not notes:
+            return f"📭 No notes found for {description}"
+        
+        lines = [
+            f"🏷️ **Notes matching {description}**\n",
+            f"Found {len(matches)} notes (showing {len(notes)})\n",
+        ]
+        for i, note in enumerate(notes, 1):
+            mod_time = datetime.fromtimestamp(note.mtime)
+            lines.append(f"{i}. **{note.title}**")
+            lines.append(f"   📄 Path: `{note.path}`")
+            lines.append(f"   📑 Type: {note.note_type} | 🏷️ Tags: {', '.join('#' + tag for tag in note.tags) or 'none'}")
+            lines.append(f"   🕒 Modified: {mod_time.strftime('%Y-%m-%d %H:%M')}\n")
+        
+        return "\n".join(lines)
+        
+    except Exception as e:
+        raise McpError(
+            ErrorData(
+                code=INTERNAL_ERROR,
+                message=f"Failed to query notes: {str(e)}"
+            )
+        ) from e
+
+@mcp.tool()
+def get_backlinks(note_name: str) -> str:
+    """
+    List the notes that link to a note ("what links here").
+    
+    Answered from the vault's link graph index, which is updated as notes change.
+    
+    Args:
+        note_name: Path or name of the note (e.g., "Projects/MCP Integration.md" or "MCP Integration")
+        
+    Returns:
+        The notes containing a [[wikilink]] to this note
+    """
+    try:
+        rel_path = resolve_note_name(note_name)
+        if rel_path is None:
+            return note_not_found_message(note_name)
+        
+        index = get_vault_index()
+        sources = index.backlinks(rel_path)
+        if not sources:
+            return f"🔗 No notes link to '{rel_path}' yet.\n\n💡 Tip: Link to it from other notes using: [[{Path(rel_path).stem}]]"
+        
+        lines = [f"🔗 **Backlinks to {rel_path}**\n", f"{len(sources)} notes link here:\n"]
+        for i, source in enumerate(sources, 1):
+            lines.append(f"{i}. **{index.title_of(source) or Path(source).stem}**")
+            lines.append(f"   📄 Path: `{source}`")
+        return "\n".join(lines)
+        
+    except Exception as e:
+        raise McpError(
+            ErrorData(
+                code=INTERNAL_ERROR,
+                message=f"Failed to get backlinks for '{note_name}': {str(e)}"
+            )
+        ) from e
+
+@mcp.tool()
+def get_neighbors(note_name: str, depth: int = 1, direction: str = "both") -> str:
+    """
+    Explore the link graph around a note.
+    
+    Walks [[wikilinks]] outwards from the note using the link graph index and
+    returns the connected notes grouped by distance.
+    
+    Args:
+        note_name: Path or name of the note to start from
+        depth: How many links away to go (default: 1, max: 3)
+        direction: "out" for notes it links to, "in" for notes linking to it, or "both"
+        
+    Returns:
+        Connected notes grouped by their distance from the starting note
+        
+    Example:
+        get_neighbors("12 Factors for building agents", depth=2)
+    """
+    try:
+        if direction not in ('out', 'in', 'both'):
+            return f"❌ Unknown direction '{direction}'. Use 'out', 'in' or 'both'."
+        depth = max(1, min(depth, NEIGHBORS_MAX_DEPTH))
+        
+        start = resolve_note_name(note_name)
+        if start is None:
+            return note_not_found_message(note_name)
+        
+        index = get_vault_index()
+        # Breadth-first search; each note remembers how it was reached
+        reached: Dict[str, Tuple[int, str, str]] = {start: (0, '', '')}
+        unresolved: List[str] = []
+        frontier = [start]
+        truncated = False
+        for distance in range(1, depth + 1):
+            next_frontier = []
+            for path in frontier:
+                edges = []
+                if direction in ('out', 'both'):
+                    linked, missing = index.outgoing_links(path)
+                    edges.extend((target, '→') for target in linked)
+                    if path == start:
+                        unresolved = missing
+                if direction in ('in', 'both'):
+                    edges.extend((source, '←') for source in index.backlinks(path))
+                for neighbor, arrow in edges:
+                    if neighbor in reached:
+                        continue
+                    if len(reached) > NEIGHBORS_MAX_NOTES:
+                        truncated = True
+                        break
+                    reached[neighbor] = (distance, path, arrow)
+                    next_frontier.append(neighbor)
+                if truncated:
+                    # Stop expanding altogether once the cap is reached
+                    break
+            frontier = next_frontier
+            if not frontier or truncated:
+                break
+        
+        lines = [f"🕸️ **Link graph around {start}** (depth {depth}, {direction})\n"]
+        if len(reached) == 1:
+            lines.append("No linked notes found.")
+        for distance in range(1, depth + 1):
+            level = [(path, via, arrow) for path, (d, via, arrow) in reached.items() if d == distance]
+            if not level:
+                continue
+            lines.append(f"**{distance} link{'s' if distance > 1 else ''} away** ({len(level)} notes)")
+            for path, via, arrow in sorted(level):
+                via_note = '' if via == start else f" (via {index.title_of(via) or via})"
+                lines.append(f"  {arrow} **{index.title_of(path) or Path(path).stem}** `{path}`{via_note}")
+            lines.append("")
+        if unresolved:
+            lines.append(f"⚪ Links to notes that don't exist yet: {', '.join(unresolved)}")
+        if truncated:
+            lines.append(f"*Stopped after {NEIGHBORS_MAX_NOTES} notes. Use a smaller depth or direction to narrow it down.*")
+        lines.append("\n→ links to · ← linked from")
+        return "\n".join(lines)
+        
+    except Exception as e:
+        raise McpError(
+            ErrorData(
+                code=INTERNAL_ERROR,
+                message=f"Failed to get neighbors for '{note_name}': {str(e)}"
+            )
+        ) from e
+
 @mcp.resource("obsidian://vault/info")
 def vault_info() -> str:
     """
@@ -485,18 +2250,8 @@ def vault_info() -> str:
     try:
         vault_path = get_vault_path()
         
-        # Gather statistics
-        total_notes = len(list(vault_path.rglob("*.md")))
-        
-        # Count notes by folder
-        folder_stats = {}
-        for md_file in vault_path.rglob("*.md"):
-            folder = md_file.parent.relative_to(vault_path)
-            folder_name = str(folder) if str(folder) != "." else "Root"
-            folder_stats[folder_name] = folder_stats.get(folder_name, 0) + 1
-        
-        # Get vault size
-        total_size = sum(f.stat().st_size for f in vault_path.rglob("*.md"))
+        # Gather statistics from the note index
+        total_notes, total_size, folder_stats = get_vault_index().stats()
         size_mb = total_size / (1024 * 1024)
         
         # Format response
@@ -512,11 +2267,22 @@ def vault_info() -> str:
         for folder, count in sorted(folder_stats.items()):
             response += f"  • {folder}: {count} notes\n"
         
+        top_tags = get_vault_index().tag_counts().most_common(10)
+        if top_tags:
+            response += "\n**🏷️ Top Tags**:\n"
+            for tag, count in top_tags:
+                response += f"  • #{tag}: {count} notes\n"
+        
         response += f"""
 **🛠️ Available Tools**:
-  • `read_note(note_path)` - Read any note from your vault
+  • `read_note(note_path, offset, length)` - Read any note, or a byte range of it
+  • `read_note_section(note_path, heading)` - Read one section of a large note
   • `create_note(title, content, ...)` - Create structured notes
-  • `list_notes(folder, limit)` - Browse your notes
+  • `create_notes_batch(notes)` - Create many notes in one request
+  • `list_notes(folder, limit, cursor, format)` - Browse your notes page by page
+  • `search_notes(query, limit, folder)` - Full-text search with ranked snippets
+  • `query_notes(tags, note_type, modified_after, ...)` - Filter notes by frontmatter
+  • `get_backlinks(note)` / `get_neighbors(note, depth)` - Explore the link graph
 
 **💡 Tips**:
   • Notes are stored as Markdown files with YAML frontmatter
@@ -545,8 +2311,13 @@ def obsidian_assistant_prompt() -> str:
 **Your capabilities include:**
 
 📖 **Reading Notes**: Use `read_note(note_path)` to retrieve any note from the vault
+📑 **Reading Sections**: Use `read_note_section(note_path, heading)` to read one part of a long note (omit heading for its outline)
 ✍️ **Creating Notes**: Use `create_note(title, content, folder, tags, note_type)` to create structured notes
-📚 **Browsing**: Use `list_notes(folder, limit)` to explore the vault contents
+📦 **Bulk Creation**: Use `create_notes_batch(notes)` to create many notes at once instead of calling `create_note` repeatedly
+📚 **Browsing**: Use `list_notes(folder, limit, cursor)` to explore the vault contents page by page
+🔍 **Searching**: Use `search_notes(query, limit, folder)` to find notes by their content
+🏷️ **Filtering**: Use `query_notes(tags, note_type, modified_after)` to find notes by tags, type or date
+🔗 **Links**: Use `get_backlinks(note)` for "what links here" and `get_neighbors(note, depth)` to explore connected notes
 ℹ️ **Vault Info**: Reference the `obsidian://vault/info` resource for vault statistics
 
 **Vault Location**: {get_vault_path()}
@@ -586,13 +2357,20 @@ if __name__ == "__main__":
     if not vault_path.exists():
         print("⚠️  Vault doesn't exist - it will be created with sample structure")
     else:
-        note_count = len(list(vault_path.rglob("*.md")))
+        note_count = get_vault_index().stats()[0]
         print(f"📝 Found {note_count} notes in vault")
+        if _vault_watcher is not None:
+            print(f"👀 Watching vault for changes ({_vault_watcher.mode} mode)")
     
     print("\n🛠️ Available tools:")
-    print("   • read_note(note_path) - Read any note")
+    print("   • read_note(note_path, offset, length) - Read any note")
+    print("   • read_note_section(note_path, heading) - Read one section of a note")
     print("   • create_note(title, content, ...) - Create structured notes")
-    print("   • list_notes(folder, limit) - Browse vault contents")
+    print("   • create_notes_batch(notes) - Create many notes in one request")
+    print("   • list_notes(folder, limit, cursor, format) - Browse vault contents")
+    print("   • search_notes(query, limit, folder) - Full-text search")
+    print("   • query_notes(tags, note_type, modified_after) - Filter by frontmatter")
+    print("   • get_backlinks(note) / get_neighbors(note, depth) - Explore the link graph")
     
     print("\n📊 Available resources:")
     print("   • obsidian://vault/info - Vault statistics and configuration")